@@ -21,6 +21,9 @@ class MyInstall(install):
             print "Error compiling t2p.c.   Try running 'make'."
             exit(1)
         else:
+            #convert the LSA term vectors to memory-mapped matrices, so they are installed
+            #ready to load rather than converted on every run of a read-only install
+            subprocess.call(['make', 'lsa'],cwd=path.join(here,'vfclust'))
             install.run(self)
 
 setup(
@@ -100,6 +103,8 @@ setup(
              'data/cmudict.0.7a.tree',
              'data/modified_cmudict.dat',
              'data/animals_term_vector_dictionaries/term_vectors_dict91_cpickle.dat',
+             'data/animals_term_vector_dictionaries/term_vectors91.npy',
+             'data/animals_term_vector_dictionaries/term_vectors91_words.txt',
              ],
         'data/nltk_data/corpora/wordnet':[
             'data/nltk_data/corpora/wordnet/adj.exc',
@@ -128,7 +133,9 @@ setup(
              'example/EXAMPLE.TextGrid',
              'example/EXAMPLE_sem.csv',
              'example/EXAMPLE_sem.TextGrid',
-             'example/EXAMPLE_sem_custom.TextGrid'],
+             'example/EXAMPLE_sem_custom.TextGrid',
+             'example/EXAMPLE_short.TextGrid',
+             'example/EXAMPLE_binary.TextGrid'],
         't2p':
             ['t2p/t2p.c',
              't2p/t2pin.tmp'
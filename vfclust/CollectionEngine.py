@@ -0,0 +1,231 @@
+"""
+Detection of collections (chains, clusters) from the similarity scores of a response.
+
+Every collection VFClust finds is a run of consecutive Units, so a collection is stored as a
+half-open interval of Unit indices, (start, end), and the collections of a response as a k x 2
+integer array of intervals sorted by start.  The Units of collection i are
+parsed_response[start:end].
+"""
+from bisect import bisect_right
+
+import numpy as np
+
+__docformat__ = "restructuredtext en"
+
+
+def find_chains(size, adjacent_scores, threshold):
+    """Returns the chains of a response as an array of intervals.
+
+    :param int size: number of Units in the response, n.
+    :param adjacent_scores: array of the n - 1 similarity scores between adjacent Units,
+        i.e. entry i is the score of Unit i compared to Unit i + 1.
+    :param float threshold: similarity cutoff; adjacent Units are linked if their score is
+        greater than or equal to it.
+    :returns: k x 2 integer array of (start, end) intervals, one per chain.
+
+    A chain is a maximal run of Units in which every Unit is linked to the one before it.  Any
+    adjacent pair below the threshold breaks the chain, so the chains of a response are the
+    pieces between consecutive breaks, and every Unit belongs to exactly one chain (possibly a
+    singleton).
+    """
+    adjacent_scores = np.asarray(adjacent_scores, dtype=np.float64)
+    # scores that are not >= threshold (including nan) break the chain
+    with np.errstate(invalid='ignore'):
+        breaks = np.nonzero(~(adjacent_scores >= threshold))[0] + 1
+    return intervals_from_breaks(breaks, size)
+
+
+def intervals_from_breaks(breaks, size):
+    """Returns the intervals between sorted break points in a sequence of the given size.
+
+    :param breaks: sorted array of indices i (0 < i < size) at which a new interval starts.
+    :param int size: number of Units; if 0, there are no intervals.
+    :returns: k x 2 integer array of (start, end) intervals covering range(size).
+    """
+    if size == 0:
+        return np.zeros((0, 2), dtype=np.intp)
+    starts = np.concatenate(([0], breaks)).astype(np.intp)
+    ends = np.concatenate((breaks, [size])).astype(np.intp)
+    return np.column_stack((starts, ends))
+
+
+def interval_members(intervals):
+    """Returns the indices covered by a sequence of intervals, and the interval of each.
+
+    :param intervals: k x 2 integer array of half-open (start, end) intervals.  Intervals may be
+        empty or overlap, in which case an index is listed once per interval covering it.
+    :returns: (indices, owners), two arrays holding range(start, end) of every interval in
+        turn, and the position in intervals of the interval each index came from.
+    """
+    intervals = np.asarray(intervals, dtype=np.intp).reshape(-1, 2)
+    lengths = intervals[:, 1] - intervals[:, 0]
+    owners = np.repeat(np.arange(len(intervals)), lengths)
+    # position of each index within its own interval, added to the start of the interval
+    offsets = np.cumsum(lengths) - lengths
+    indices = np.arange(lengths.sum()) - offsets[owners] + intervals[owners, 0]
+    return indices, owners
+
+
+def adjacency_bitsets(linked):
+    """Returns the rows of a boolean matrix as integer bitsets.
+
+    :param linked: n x n boolean array.
+    :returns: list of n Python integers, where bit k of entry j is set if linked[j, k] is True.
+    """
+    bitsets = []
+    for row in np.asarray(linked, dtype=bool):
+        padding = -len(row) % 8
+        # packbits is big-endian, so pack the row backwards to put column 0 in the lowest bit
+        packed = np.packbits(row[::-1]).tostring()
+        bitsets.append(int(packed.encode('hex') or '0', 16) >> padding)
+    return bitsets
+
+
+def find_clusters(linked):
+    """Returns the clusters of a response as an array of intervals.
+
+    :param linked: n x n boolean array, where linked[j, k] is True if Unit j is sufficiently
+        similar to an earlier Unit k, i.e. its similarity score [j, k] is above the threshold.
+    :returns: k x 2 integer array of (start, end) intervals, one per cluster.
+
+    A cluster is a run of Units in which every Unit is linked to every earlier Unit of the run.
+    From each starting Unit, the longest such run is grown one Unit at a time: Unit j joins the
+    run if its bitset contains every member of the run, which is a single bitwise AND.  Runs
+    subsumed by a run found earlier are discarded.
+
+    Any part of a cluster is also a cluster, so the run from start + 1 extends at least as far as
+    the run from start, and growing resumes from there instead of from start + 1.  The whole
+    response then takes O(n) bitset tests.
+    """
+    bitsets = adjacency_bitsets(linked)
+    size = len(bitsets)
+    index = IntervalIndex()
+    end = 0
+    for start in range(size):
+        end = max(end, start + 1)
+        below_start = (1 << start) - 1
+        while end < size:
+            members = ((1 << end) - 1) ^ below_start
+            if bitsets[end] & members != members:
+                break
+            end += 1
+        index.add(start, end)
+    return index.intervals()
+
+
+class IntervalIndex(object):
+    """ Class holding intervals, added in order of start, that are not subsumed by one another.
+
+    The starts are kept sorted, along with the largest end of all intervals up to each position,
+    so whether an interval lies within one already in the index is a binary search and a lookup.
+    """
+
+    def __init__(self):
+        """Initializes an empty IntervalIndex."""
+        self.starts = []
+        self.ends = []
+        self.max_ends = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def covers(self, start, end):
+        """Returns True if the interval (start, end) lies within an interval in the index."""
+        # intervals starting at or before start
+        position = bisect_right(self.starts, start)
+        return position > 0 and self.max_ends[position - 1] >= end
+
+    def add(self, start, end):
+        """Adds the interval (start, end), unless it is subsumed by an interval in the index.
+
+        :param int start: first index of the interval; must not be less than the start of the
+            intervals already added.
+        :param int end: index after the last index of the interval.
+        :returns: True if the interval was added.
+        """
+        if self.starts and start < self.starts[-1]:
+            raise ValueError("Intervals must be added in order of start")
+        if self.covers(start, end):
+            return False
+        self.starts.append(start)
+        self.ends.append(end)
+        self.max_ends.append(max(end, self.max_ends[-1]) if self.max_ends else end)
+        return True
+
+    def intervals(self):
+        """Returns the intervals in the index as a k x 2 integer array."""
+        return np.array(zip(self.starts, self.ends), dtype=np.intp).reshape(-1, 2)
+
+
+def cluster_strengths(scores):
+    """Returns the strength of every run of Units as a cluster.
+
+    :param scores: n x n array of similarity scores, where [j, k] is the score of Unit j compared
+        to an earlier Unit k.
+    :returns: n x n array M, where M[start, end] (start <= end) is the smallest score between
+        two Units of start..end, i.e. the largest threshold at which Units start to end (inclusive)
+        form a cluster.  M[start, start] is inf, and entries below the diagonal are -inf.
+
+    A run is a cluster at a threshold if all of its pairs are, i.e. if both runs one Unit shorter
+    are and its first and last Units are linked, so M is filled one diagonal at a time:
+        M[start, end] = min(M[start, end - 1], M[start + 1, end], scores[end, start])
+    A nan score propagates to every run containing the pair, which is never a cluster.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    size = len(scores)
+    strengths = np.empty((size, size))
+    strengths.fill(-np.inf)
+    starts = np.arange(size)
+    strengths[starts, starts] = np.inf
+    for length in range(1, size):
+        starts = np.arange(size - length)
+        ends = starts + length
+        strengths[starts, ends] = np.minimum(np.minimum(strengths[starts, ends - 1], strengths[starts + 1, ends]),
+                                             scores[ends, starts])
+    return strengths
+
+
+def find_clusters_at(strengths, threshold):
+    """Returns the clusters at a threshold as an array of intervals, given cluster_strengths().
+
+    :param strengths: n x n array returned by cluster_strengths().
+    :param float threshold: similarity cutoff.
+    :returns: k x 2 integer array of (start, end) intervals, equal to find_clusters() of the
+        scores thresholded at threshold.
+
+    Every row of strengths decreases from the diagonal, so the longest cluster from a start ends
+    where its row falls below the threshold.  These ends never decrease with the start, so a
+    cluster is subsumed by an earlier one exactly when it ends where the previous one does.
+    """
+    size = len(strengths)
+    if size == 0:
+        return np.zeros((0, 2), dtype=np.intp)
+    with np.errstate(invalid='ignore'):
+        ends = np.arange(size) + (strengths >= threshold).sum(axis=1)
+    keep = np.concatenate(([True], ends[1:] > ends[:-1]))
+    return np.column_stack((np.nonzero(keep)[0], ends[keep])).astype(np.intp)
+
+
+def sweep_collections(collection_type, scores, thresholds):
+    """Returns the collections of a response at each of a list of thresholds.
+
+    :param str collection_type: "cluster" or "chain"
+    :param scores: n x n array of similarity scores, where [j, k] is the score of Unit j compared
+        to an earlier Unit k, as for find_clusters().  Chains only use the adjacent scores,
+        [i, i + 1], as for find_chains().
+    :param list thresholds: similarity cutoffs.
+    :returns: list with a k x 2 array of (start, end) intervals for each threshold.
+
+    Raising the threshold can only remove links between Units, so the scores are reduced once
+    to the threshold at which each adjacent pair breaks (chains) or each run stops being a
+    cluster (clusters), and every threshold is then a comparison against those.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    size = len(scores)
+    if collection_type == "chain":
+        adjacent_scores = scores[np.arange(size - 1), np.arange(1, size)] if size else np.zeros(0)
+        return [find_chains(size, adjacent_scores, threshold) for threshold in thresholds]
+    elif collection_type == "cluster":
+        strengths = cluster_strengths(scores)
+        return [find_clusters_at(strengths, threshold) for threshold in thresholds]
+    raise ValueError("Unknown collection type: " + str(collection_type))
@@ -0,0 +1,157 @@
+"""
+Batched Levenshtein distances between compact phonetic representations.
+
+The phonetic similarity score (PSS) between two words is 1 minus the Levenshtein distance
+between their compact phonetic representations, normalized to the length of the longer one.
+Rather than running a dynamic-programming loop in Python for every pair of words, the
+representations of a response are encoded as integers once, and the distances for a whole
+batch of pairs are computed together with the bit-parallel algorithm of Myers (1999), in the
+formulation of Hyyro (2001): every pair is a lane of a numpy uint64 array, and each character
+of the longer string updates all lanes with a handful of bitwise operations.
+
+Compact phonetic representations are a few characters long, so every pair fits in a single
+machine word.  The rare pair whose shorter string is longer than 63 characters falls back to
+the dynamic-programming implementation.
+"""
+import numpy as np
+
+__docformat__ = "restructuredtext en"
+
+#longest string (in characters) handled by the bit-parallel algorithm
+MAX_BIT_PARALLEL_LENGTH = 63
+
+ONE = np.uint64(1)
+ZERO = np.uint64(0)
+
+
+def edit_distance(word1, word2):
+    """Returns the Levenshtein distance between two strings.
+
+    (This method is a modification of a Levenshtein distance function
+    available at http://hetland.org/coding/python/levenshtein.py.)
+    """
+    word1_length, word2_length = len(word1), len(word2)
+    if word1_length > word2_length:
+        # Make sure n <= m, to use O(min(n,m)) space
+        word1, word2 = word2, word1
+        word1_length, word2_length = word2_length, word1_length
+    current = range(word1_length + 1)
+    for i in range(1, word2_length + 1):
+        previous, current = current, [i] + [0] * word1_length
+        for j in range(1, word1_length + 1):
+            add, delete = previous[j] + 1, current[j - 1] + 1
+            change = previous[j - 1]
+            if word1[j - 1] != word2[i - 1]:
+                change += 1
+            current[j] = min(add, delete, change)
+    return current[word1_length]
+
+
+def phonetic_similarity(word1, word2):
+    """Returns the phonetic similarity score (PSS) between two compact phonetic representations.
+
+    The score is 1 minus the Levenshtein distance between the strings, normalized to the
+    length of the longer string.
+    """
+    return 1 - edit_distance(word1, word2) / float(max(len(word1), len(word2)))
+
+
+def encode(strings):
+    """Encodes a list of strings as a padded matrix of integer character codes.
+
+    :param list strings: list of n strings, e.g. compact phonetic representations.
+    :returns: tuple of (codes, lengths), where codes is an n x (longest length) int32 array
+        in which each character is replaced by an integer and padding is -1, and lengths
+        is an array of the string lengths.
+    """
+    alphabet = {}
+    width = max([len(string) for string in strings] + [1])
+    codes = np.empty((len(strings), width), dtype=np.int32)
+    codes.fill(-1)
+    for i, string in enumerate(strings):
+        codes[i, :len(string)] = [alphabet.setdefault(character, len(alphabet)) for character in string]
+    lengths = np.array([len(string) for string in strings], dtype=np.int64)
+    return codes, lengths
+
+
+def bit_parallel_distances(patterns, pattern_lengths, texts, text_lengths):
+    """Returns the Levenshtein distances between pairs of encoded strings.
+
+    :param patterns: k x w array of character codes of the first string of each pair.
+    :param pattern_lengths: array of k pattern lengths, none of which may exceed
+        MAX_BIT_PARALLEL_LENGTH.
+    :param texts: k x v array of character codes of the second string of each pair.
+    :param text_lengths: array of k text lengths.
+    :returns: array of k distances.
+    """
+    pairs = len(pattern_lengths)
+    width = patterns.shape[1]
+    bit_values = np.left_shift(ONE, np.arange(width, dtype=np.uint64))
+    in_pattern = np.arange(width)[np.newaxis, :] < pattern_lengths[:, np.newaxis]
+
+    masks = np.left_shift(ONE, pattern_lengths.astype(np.uint64)) - ONE
+    # bit of the last row of the dynamic-programming matrix (unused for empty patterns)
+    last_bits = np.where(pattern_lengths > 0,
+                         np.left_shift(ONE, np.maximum(pattern_lengths - 1, 0).astype(np.uint64)),
+                         ZERO)
+
+    positive_vertical = masks.copy()
+    negative_vertical = np.zeros(pairs, dtype=np.uint64)
+    distances = pattern_lengths.astype(np.int64)
+
+    for position in range(int(text_lengths.max()) if pairs else 0):
+        active = position < text_lengths
+        matches = (patterns == texts[:, position][:, np.newaxis]) & in_pattern
+        equal = (matches * bit_values).sum(axis=1, dtype=np.uint64)
+
+        vertical = equal | negative_vertical
+        horizontal = ((((equal & positive_vertical) + positive_vertical) & masks) ^ positive_vertical) | equal
+        positive_horizontal = negative_vertical | (~(horizontal | positive_vertical) & masks)
+        negative_horizontal = positive_vertical & horizontal
+
+        distances += active & ((positive_horizontal & last_bits) != ZERO)
+        distances -= active & ((negative_horizontal & last_bits) != ZERO)
+
+        # the first row of the matrix grows by one for every character of the text
+        positive_horizontal = (np.left_shift(positive_horizontal, ONE) | ONE) & masks
+        negative_horizontal = np.left_shift(negative_horizontal, ONE) & masks
+
+        positive_vertical = np.where(active,
+                                     negative_horizontal | (~(vertical | positive_horizontal) & masks),
+                                     positive_vertical)
+        negative_vertical = np.where(active, positive_horizontal & vertical, negative_vertical)
+
+    # an empty pattern is as far from the text as the text is long
+    return np.where(pattern_lengths > 0, distances, text_lengths)
+
+
+def phonetic_similarities(codes, lengths, rows, cols):
+    """Returns the phonetic similarity scores (PSS) of a batch of pairs of encoded strings.
+
+    :param codes: matrix of character codes, as returned by encode().
+    :param lengths: array of string lengths, as returned by encode().
+    :param rows: integer array with the index of the first string of each pair.
+    :param cols: integer array with the index of the second string of each pair.
+    :returns: array of scores, equal to phonetic_similarity() of each pair.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    cols = np.asarray(cols, dtype=np.intp)
+    # the shorter string of each pair is the pattern, so that it fits in a machine word
+    swap = lengths[rows] > lengths[cols]
+    patterns = np.where(swap, cols, rows)
+    texts = np.where(swap, rows, cols)
+    pattern_lengths = lengths[patterns]
+    text_lengths = lengths[texts]
+
+    distances = np.zeros(len(rows), dtype=np.int64)
+    short = pattern_lengths <= MAX_BIT_PARALLEL_LENGTH
+    if short.any():
+        distances[short] = bit_parallel_distances(codes[patterns[short]], pattern_lengths[short],
+                                                  codes[texts[short]], text_lengths[short])
+    for k in np.nonzero(~short)[0]:
+        distances[k] = edit_distance(codes[patterns[k], :pattern_lengths[k]].tolist(),
+                                     codes[texts[k], :text_lengths[k]].tolist())
+
+    # two empty strings are identical
+    longest = np.maximum(text_lengths, 1).astype(np.float64)
+    return 1 - distances / longest
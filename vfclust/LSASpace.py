@@ -0,0 +1,355 @@
+"""
+Memory-mapped LSA term vector spaces.
+
+Each LSA space is stored as a float32 .npy matrix whose rows are the term vectors of the
+permissible words, normalized to unit length, along with a text file listing the word that
+each row belongs to.  Because the rows are normalized ahead of time, the cosine between two
+term vectors is just their dot product, and the similarity of every pair of words in a response
+is a single matrix product.  The matrix is opened with mmap, so it loads almost instantly and
+processes analyzing responses at the same time share the same pages of memory.
+
+The spaces, and the stack of the spaces of every dimensionality used by the LSA sweep, are
+converted from the pickled term vector dictionaries the first time they are loaded, or ahead of
+time by running
+
+    $ python LSASpace.py
+
+from the vfclust/ directory (or "make lsa"), which is done when the package is installed.
+"""
+import os
+import re
+import sys
+import tempfile
+import cPickle as pickle
+
+import numpy as np
+
+__docformat__ = "restructuredtext en"
+
+data_path = os.path.join(os.path.dirname(__file__), 'data/')
+
+#dimensionalities of the LSA spaces, i.e. supported values of clustering_parameter
+LSA_DIMENSIONALITIES = range(50, 101)
+
+
+def get_space_paths(directory, dimensionality):
+    """Returns the paths of the matrix and word list files for an LSA space.
+
+    :param str directory: directory holding the term vectors of a category.
+    :param int dimensionality: dimensionality of the LSA space.
+    :returns: tuple of (matrix path, word list path)
+    """
+    name = 'term_vectors' + str(dimensionality)
+    return (os.path.join(directory, name + '.npy'),
+            os.path.join(directory, name + '_words.txt'))
+
+
+def get_dictionary_path(directory, dimensionality):
+    """Returns the path of the pickled term vector dictionary of an LSA space."""
+    return os.path.join(directory, 'term_vectors_dict' + str(dimensionality) + '_cpickle.dat')
+
+
+def write_atomically(path, write):
+    """Writes a file through a temporary file in the same directory, which is then renamed.
+
+    Processes loading the file at the same time see either no file or the complete file, never
+    a partly written one.
+
+    :param str path: path of the file to write.
+    :param write: function writing the contents of the file to the open file object it is passed.
+    """
+    handle, temp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(handle, 'wb') as outfile:
+            write(outfile)
+        os.chmod(temp_path, 0644) #mkstemp creates the file readable by its owner only
+        os.rename(temp_path, path)
+    except:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class LSASpace(object):
+    """ Class holding a matrix of unit-normalized term vectors and an index of its rows."""
+
+    def __init__(self, vectors, words):
+        """Initializes an LSASpace from a matrix of unit-normalized term vectors.
+
+        :param vectors: 2-dimensional numpy array (possibly memory-mapped) with one
+            unit-normalized term vector per row.
+        :param list words: the word corresponding to each row of vectors.
+        """
+        self.vectors = vectors
+        self.words = list(words)
+        self.index = dict((word, row) for row, word in enumerate(self.words))
+
+    @classmethod
+    def from_term_vector_dictionary(cls, term_vectors):
+        """Builds an LSASpace from a dictionary mapping words to lists of floats.
+
+        :param dict term_vectors: dictionary of term vectors, as stored in the
+            term_vectors_dict*_cpickle.dat files.
+        :rtype : LSASpace
+        """
+        words = sorted(term_vectors)
+        vectors = np.array([term_vectors[word] for word in words], dtype=np.float64)
+        norms = np.sqrt((vectors * vectors).sum(axis=1))
+        norms[norms == 0] = 1 # zero vectors stay zero instead of becoming nan
+        vectors /= norms[:, np.newaxis]
+        return cls(vectors.astype(np.float32), words)
+
+    @classmethod
+    def load(cls, directory, dimensionality, mmap=True):
+        """Loads an LSASpace previously written with save().
+
+        :param str directory: directory holding the term vectors of a category.
+        :param int dimensionality: dimensionality of the LSA space.
+        :param bool mmap: If True (default), the matrix is memory-mapped rather than read.
+        :rtype : LSASpace
+        """
+        matrix_path, words_path = get_space_paths(directory, dimensionality)
+        vectors = np.load(matrix_path, mmap_mode='r' if mmap else None)
+        with open(words_path, 'r') as infile:
+            words = infile.read().split('\n')
+        return cls(vectors, words)
+
+    @classmethod
+    def load_or_convert(cls, directory, dimensionality, quiet=False):
+        """Loads an LSASpace, converting it from the pickled term vector dictionary if needed.
+
+        :param str directory: directory holding the term vectors of a category.
+        :param int dimensionality: dimensionality of the LSA space.
+        :param bool quiet: If True, suppresses output to screen.
+        :rtype : LSASpace
+
+        The first time a space is used, it is converted from term_vectors_dict*_cpickle.dat and
+        saved next to it, so that later loads are memory-mapped.  If the directory is not
+        writable, the converted space is used without being saved.
+        """
+        matrix_path, words_path = get_space_paths(directory, dimensionality)
+        if os.path.isfile(matrix_path) and os.path.isfile(words_path):
+            return cls.load(directory, dimensionality)
+
+        if not quiet:
+            print "Converting LSA term vectors to a matrix..."
+        with open(get_dictionary_path(directory, dimensionality), 'rb') as infile:
+            space = cls.from_term_vector_dictionary(pickle.load(infile))
+        try:
+            space.save(directory, dimensionality)
+        except (IOError, OSError):
+            if not quiet:
+                print "Could not save the converted LSA term vectors to", directory
+        return space
+
+    def save(self, directory, dimensionality):
+        """Writes the matrix and word list to the given directory.
+
+        :param str directory: directory holding the term vectors of a category.
+        :param int dimensionality: dimensionality of the LSA space.
+
+        The word list is written last, since a space is only loaded once both files exist.
+        """
+        matrix_path, words_path = get_space_paths(directory, dimensionality)
+        write_atomically(matrix_path,
+                         lambda outfile: np.save(outfile, np.asarray(self.vectors, dtype=np.float32)))
+        write_atomically(words_path, lambda outfile: outfile.write('\n'.join(self.words)))
+
+    def __contains__(self, word):
+        """Implements 'word in lsa_space'."""
+        return word in self.index
+
+    def rows(self, words):
+        """Returns the row indices of a list of words.  Raises KeyError for unknown words."""
+        return np.array([self.index[word] for word in words], dtype=np.intp)
+
+    def similarity(self, word1, word2):
+        """Returns the cosine of the term vectors of two words."""
+        return float(np.dot(self.vectors[self.index[word1]].astype(np.float64),
+                            self.vectors[self.index[word2]]))
+
+    def similarity_matrix(self, words):
+        """Returns the matrix of cosines between the term vectors of every pair of words.
+
+        :param list words: list of n words, all of which must be in the space.
+        :returns: n x n numpy array, where entry [i, j] is the cosine between words i and j.
+        """
+        vectors = self.vectors[self.rows(words)].astype(np.float64)
+        return vectors.dot(vectors.T)
+
+
+def get_stack_paths(directory, first, last):
+    """Returns the paths of the tensor and word list files for a stack of LSA spaces.
+
+    :param str directory: directory holding the term vectors of a category.
+    :param int first: lowest dimensionality in the stack.
+    :param int last: highest dimensionality in the stack.
+    :returns: tuple of (tensor path, word list path)
+    """
+    name = 'term_vectors' + str(first) + '-' + str(last)
+    return (os.path.join(directory, name + '.npy'),
+            os.path.join(directory, name + '_words.txt'))
+
+
+class LSAStack(object):
+    """ Class holding the LSA spaces of a range of dimensionalities in a single tensor.
+
+    Entry [d, row] of the tensor is the unit-normalized term vector of a word in the space of the
+    d-th dimensionality, padded with zeros to the width of the largest space.  Padding does not
+    change dot products, so the similarity matrices of a response in every space are a single
+    batched matrix product.
+    """
+
+    def __init__(self, vectors, words, dimensionalities):
+        """Initializes an LSAStack from a tensor of unit-normalized term vectors.
+
+        :param vectors: 3-dimensional numpy array (possibly memory-mapped) of shape
+            (number of spaces, number of words, largest dimensionality).
+        :param list words: the word corresponding to each row of every space.
+        :param list dimensionalities: the dimensionality of each space.
+        """
+        self.vectors = vectors
+        self.words = list(words)
+        self.index = dict((word, row) for row, word in enumerate(self.words))
+        self.dimensionalities = list(dimensionalities)
+        self.positions = dict((dimensionality, position)
+                              for position, dimensionality in enumerate(self.dimensionalities))
+
+    @classmethod
+    def from_spaces(cls, spaces, dimensionalities):
+        """Builds an LSAStack from a list of LSASpaces.
+
+        :param list spaces: LSASpace of each dimensionality.
+        :param list dimensionalities: the dimensionality of each space.
+        :rtype : LSAStack
+
+        The words of the stack are those of all spaces; a word missing from a space gets a zero
+        vector in it, i.e. a similarity of 0 to every other word.
+        """
+        words = sorted(set(word for space in spaces for word in space.words))
+        index = dict((word, row) for row, word in enumerate(words))
+        width = max([space.vectors.shape[1] for space in spaces] + [0])
+        vectors = np.zeros((len(spaces), len(words), width), dtype=np.float32)
+        for position, space in enumerate(spaces):
+            rows = np.array([index[word] for word in space.words], dtype=np.intp)
+            vectors[position, rows, :space.vectors.shape[1]] = space.vectors
+        return cls(vectors, words, dimensionalities)
+
+    @classmethod
+    def load(cls, directory, first, last, mmap=True):
+        """Loads an LSAStack previously written with save().
+
+        :param str directory: directory holding the term vectors of a category.
+        :param int first: lowest dimensionality in the stack.
+        :param int last: highest dimensionality in the stack.
+        :param bool mmap: If True (default), the tensor is memory-mapped rather than read.
+        :rtype : LSAStack
+        """
+        tensor_path, words_path = get_stack_paths(directory, first, last)
+        vectors = np.load(tensor_path, mmap_mode='r' if mmap else None)
+        with open(words_path, 'r') as infile:
+            words = infile.read().split('\n')
+        return cls(vectors, words, range(first, last + 1))
+
+    @classmethod
+    def load_or_convert(cls, directory, first, last, quiet=False):
+        """Loads an LSAStack, building it from the spaces of each dimensionality if needed.
+
+        :param str directory: directory holding the term vectors of a category.
+        :param int first: lowest dimensionality in the stack.
+        :param int last: highest dimensionality in the stack.
+        :param bool quiet: If True, suppresses output to screen.
+        :rtype : LSAStack
+
+        The first time a stack is used, it is built from the .npy matrices of each dimensionality
+        or, where there are none, from term_vectors_dict*_cpickle.dat, and saved next to them.
+        """
+        tensor_path, words_path = get_stack_paths(directory, first, last)
+        if os.path.isfile(tensor_path) and os.path.isfile(words_path):
+            return cls.load(directory, first, last)
+
+        if not quiet:
+            print "Stacking LSA term vectors of dimensionalities", first, "to", last, "..."
+        spaces = []
+        for dimensionality in range(first, last + 1):
+            matrix_path, _ = get_space_paths(directory, dimensionality)
+            if os.path.isfile(matrix_path):
+                spaces.append(LSASpace.load(directory, dimensionality))
+            else:
+                with open(get_dictionary_path(directory, dimensionality), 'rb') as infile:
+                    spaces.append(LSASpace.from_term_vector_dictionary(pickle.load(infile)))
+        stack = cls.from_spaces(spaces, range(first, last + 1))
+        try:
+            stack.save(directory)
+        except (IOError, OSError):
+            if not quiet:
+                print "Could not save the stacked LSA term vectors to", directory
+        return stack
+
+    def save(self, directory):
+        """Writes the tensor and word list to the given directory.
+
+        As with LSASpace.save(), the word list is written last.
+        """
+        tensor_path, words_path = get_stack_paths(directory, self.dimensionalities[0], self.dimensionalities[-1])
+        write_atomically(tensor_path,
+                         lambda outfile: np.save(outfile, np.asarray(self.vectors, dtype=np.float32)))
+        write_atomically(words_path, lambda outfile: outfile.write('\n'.join(self.words)))
+
+    def __contains__(self, word):
+        """Implements 'word in lsa_stack'."""
+        return word in self.index
+
+    def rows(self, words):
+        """Returns the row indices of a list of words.  Raises KeyError for unknown words."""
+        return np.array([self.index[word] for word in words], dtype=np.intp)
+
+    def similarity(self, word1, word2, dimensionality):
+        """Returns the cosine of the term vectors of two words in the space of a dimensionality."""
+        vectors = self.vectors[self.positions[dimensionality]]
+        return float(np.dot(vectors[self.index[word1]].astype(np.float64), vectors[self.index[word2]]))
+
+    def similarity_matrices(self, words):
+        """Returns the matrices of cosines between the term vectors of every pair of words, in every space.
+
+        :param list words: list of n words, all of which must be in the stack.
+        :returns: numpy array of shape (number of spaces, n, n), where entry [d, i, j] is the
+            cosine between words i and j in the space of dimensionality self.dimensionalities[d].
+        """
+        vectors = self.vectors[:, self.rows(words), :].astype(np.float64)
+        return np.matmul(vectors, vectors.transpose(0, 2, 1))
+
+
+def main(directory=data_path):
+    """Converts the pickled term vector dictionaries of every category to LSA spaces, and saves them.
+
+    Categories with the term vectors of every dimensionality in LSA_DIMENSIONALITIES also get
+    the LSAStack used by the LSA sweep.
+    """
+    for category in sorted(os.listdir(directory)):
+        category_directory = os.path.join(directory, category)
+        if not category.endswith('_term_vector_dictionaries') or not os.path.isdir(category_directory):
+            continue
+        spaces = {}
+        for name in sorted(os.listdir(category_directory)):
+            match = re.match(r'term_vectors_dict(\d+)_cpickle\.dat$', name)
+            if match is None:
+                continue
+            dimensionality = int(match.group(1))
+            with open(get_dictionary_path(category_directory, dimensionality), 'rb') as infile:
+                space = LSASpace.from_term_vector_dictionary(pickle.load(infile))
+            space.save(category_directory, dimensionality)
+            print "Saved", len(space.words), "term vectors to", get_space_paths(category_directory, dimensionality)[0]
+            spaces[dimensionality] = space
+        if all(dimensionality in spaces for dimensionality in LSA_DIMENSIONALITIES):
+            stack = LSAStack.from_spaces([spaces[dimensionality] for dimensionality in LSA_DIMENSIONALITIES],
+                                         LSA_DIMENSIONALITIES)
+            stack.save(category_directory)
+            print "Saved the stacked term vectors to", \
+                get_stack_paths(category_directory, LSA_DIMENSIONALITIES[0], LSA_DIMENSIONALITIES[-1])[0]
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
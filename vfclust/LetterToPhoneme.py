@@ -0,0 +1,207 @@
+"""
+In-process letter-to-phoneme conversion with the t2p decision tree.
+
+Words that are not in the CMU dictionary are given a pronunciation by the decision tree in
+data/cmudict.0.7a.tree, which was trained for the t2p program (t2p/t2p.c, by the MBRDICO
+project).  Running the t2p binary means starting a process and parsing the whole tree for every
+word, so this module implements the same tree format and evaluation in Python: the tree is
+parsed once per process into flat arrays, and any number of words can then be transcribed
+without leaving the interpreter.  The output is identical to that of "t2p -transcribe".
+
+Tree format (see parse_Switch in t2p.c):
+    SWITCH : '[' feature_index default_phoneme CASE+ ']'
+    CASE   : feature SWITCH | feature phoneme
+preceded by an "ID30.5" header, '#' comment lines and a line describing the feature vector,
+e.g. "LLLTRRRP" for three letters to the left, the target letter, three letters to the right
+and one phoneme of feedback.
+"""
+import os
+import re
+from array import array
+from bisect import bisect_left
+
+__docformat__ = "restructuredtext en"
+
+data_path = os.path.join(os.path.dirname(__file__), 'data/')
+
+TREE_VERSION = "ID30.5"
+TEXT_BOUNDARY = "-"
+PHONEME_BOUNDARY = "-"
+PHONEME_EPSILON = "_"
+
+#decision trees already loaded in this process, by path
+_decision_trees = {}
+
+
+class DecisionTree(object):
+    """ Class holding a t2p decision tree in flat arrays, and methods for transcribing words with it.
+
+    Every SWITCH of the tree is numbered, and stored as:
+        - feature_indices[s]: index of the feature of the vector tested by switch s
+        - defaults[s]: string id of the phoneme returned when no case matches
+    Every CASE is stored as a key, switch * number of strings + feature string id, in the sorted
+    array case_keys, with the corresponding entry of case_targets holding either the number of
+    the next switch, or (if negative) -1 - the string id of the phoneme to return.
+    """
+
+    def __init__(self, tree_path):
+        """Parses a decision tree file.
+
+        :param str tree_path: path of the .tree file, e.g. data/cmudict.0.7a.tree
+        """
+        with open(tree_path, 'r') as infile:
+            header = infile.readline()
+            if not header.startswith(TREE_VERSION):
+                raise ValueError(TREE_VERSION + " is not compatible with format: " + header)
+            # skip copyright notice
+            line = infile.readline()
+            while line.startswith('#'):
+                line = infile.readline()
+            self.parse_vector_format(line)
+            tokens = infile.read().split()
+
+        self.strings = []
+        self.string_ids = {}
+        feature_indices = []
+        defaults = []
+        cases = []
+
+        tokens = iter(tokens)
+        if next(tokens, None) != '[':
+            raise ValueError("Lack [")
+
+        def new_switch():
+            feature_indices.append(int(next(tokens)))
+            defaults.append(self.intern(next(tokens)))
+            cases.append([])
+            return len(feature_indices) - 1
+
+        stack = [new_switch()]
+        while stack:
+            token = next(tokens)
+            if token == ']':
+                # leave the level
+                stack.pop()
+                continue
+            feature = self.intern(token)
+            value = next(tokens)
+            if value == '[':
+                # this is a recursive switch
+                switch = new_switch()
+                cases[stack[-1]].append((feature, switch))
+                stack.append(switch)
+            else:
+                # this is a terminal node
+                cases[stack[-1]].append((feature, -1 - self.intern(value)))
+
+        # flatten the cases into sorted arrays; t2p uses the first case that matches a feature
+        self.feature_indices = array('i', feature_indices)
+        self.defaults = array('i', defaults)
+        targets = {}
+        for switch, switch_cases in enumerate(cases):
+            for feature, target in switch_cases:
+                targets.setdefault(switch * len(self.strings) + feature, target)
+        keys = sorted(targets)
+        self.case_keys = array('l', keys)
+        self.case_targets = array('l', [targets[key] for key in keys])
+
+    def parse_vector_format(self, line):
+        """Reads the description of the feature vector, e.g. "LLLTRRRP"."""
+        self.left_graphemes = line.count('L')
+        self.right_graphemes = line.count('R')
+        right_to_left_feedback = line.count('P')
+        left_to_right_feedback = line.count('Q')
+        unknown = re.sub('[LRTPQS \n\f\r]', '', line)
+        if unknown:
+            raise ValueError("unknown attrib *" + unknown[0] + "*")
+        if 'S' in line:
+            # extra (e.g. part of speech) features are given after each word in t2p input
+            raise ValueError("Trees using extra features (S) are not supported")
+        if right_to_left_feedback * left_to_right_feedback != 0:
+            raise ValueError("Can't apply LEFT and RIGHT feedback at the same time")
+        # decide the feedback direction
+        if right_to_left_feedback > left_to_right_feedback:
+            self.left_to_right = False
+            self.feedback = right_to_left_feedback
+        else:
+            self.left_to_right = True
+            self.feedback = left_to_right_feedback
+
+    def intern(self, string):
+        """Returns the id of a string of the tree, adding it if necessary."""
+        string_id = self.string_ids.get(string)
+        if string_id is None:
+            string_id = self.string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def run(self, vector):
+        """Returns the phoneme chosen by the tree for a feature vector (a list of strings)."""
+        switch = 0
+        string_count = len(self.strings)
+        while True:
+            feature = self.string_ids.get(vector[self.feature_indices[switch]])
+            if feature is not None:
+                key = switch * string_count + feature
+                position = bisect_left(self.case_keys, key)
+                if position < len(self.case_keys) and self.case_keys[position] == key:
+                    target = self.case_targets[position]
+                    if target < 0:
+                        return self.strings[-1 - target]
+                    switch = target
+                    continue
+            # default case
+            return self.strings[self.defaults[switch]]
+
+    def transcribe(self, word):
+        """Returns the phonetic representation of a word, in CMUdict format.
+
+        :param str word: the word to be phoneticized.
+        :return: A list of phonemes, e.g. ['HH', 'EH0', 'L', 'OW1'], identical to the output
+            of "t2p -transcribe" for the word, less the word itself.
+        """
+        # like t2p, only the first token of the line is transcribed
+        tokens = [token for token in re.split('[ \n\r]', word) if token]
+        if not tokens:
+            return []
+        word = tokens[0]
+
+        width = self.left_graphemes + self.right_graphemes + 1
+        graphemes = [TEXT_BOUNDARY] * self.left_graphemes + list(word) + [TEXT_BOUNDARY] * self.right_graphemes
+        phonemes = [PHONEME_BOUNDARY] * self.feedback
+        if self.left_to_right:
+            graphemes.reverse()
+
+        transcription = []
+        for j in range(len(word) - 1, -1, -1):
+            vector = graphemes[j:j + width] + [phonemes[-1 - i] for i in range(self.feedback)]
+            guess = self.run(vector)
+            if guess != PHONEME_EPSILON:
+                phonemes.append(guess)
+                if self.left_to_right:
+                    transcription.append(guess)
+                else:
+                    transcription.insert(0, guess)
+
+        # remove pseudo phonemes, e.g. K+S
+        return " ".join(transcription).replace('+', ' ').split()
+
+    def transcribe_words(self, words):
+        """Returns the phonetic representations of a list of words.
+
+        :param list words: words to be phoneticized.
+        :return: A list with one list of phonemes per word.
+        """
+        return [self.transcribe(word) for word in words]
+
+
+def get_decision_tree(tree_path=None):
+    """Returns the DecisionTree for a .tree file, parsing it only the first time in a process.
+
+    :param str tree_path: (optional) path of the .tree file. Defaults to data/cmudict.0.7a.tree
+    """
+    if tree_path is None:
+        tree_path = os.path.join(data_path, 'cmudict.0.7a.tree')
+    if tree_path not in _decision_trees:
+        _decision_trees[tree_path] = DecisionTree(tree_path)
+    return _decision_trees[tree_path]
@@ -0,0 +1,121 @@
+"""
+Hash-indexed word lists used to classify response tokens.
+
+The word lists used by VFClust (the English Open Word List, permissible words and tokenized
+names for semantic categories) are stored on disk as plain lists.  Testing a token against a
+list is a linear scan, so a Lexicon converts them to frozen sets once, when the supporting data
+is loaded, and every membership test afterwards takes constant time.
+"""
+
+__docformat__ = "restructuredtext en"
+
+#longest compound name (in words) that is combined into a single token
+MAX_COMPOUND_LENGTH = 5
+
+#key marking the end of a compound name in the compound trie (words are never None)
+COMPOUND_END = None
+
+
+class Lexicon(object):
+    """ Class holding frozen, hash-indexed views of the word lists used in clustering.
+
+    A Lexicon provides:
+        - english_words: frozenset of legal English words (phonetic clustering)
+        - permissible_words: frozenset of legal words of the category (semantic clustering)
+        - names: frozenset of tokenized responses, i.e. animal names as they are spoken
+        - compound_names: dict mapping a number of words (2-5) to a frozenset of names with
+            that many words, e.g. compound_names[2] contains 'polar bear'
+        - compound_trie: the same names as a trie of words, used to find the longest compound
+            name at a position of a response in a single walk (see match_compound_name())
+        - words_starting_with(): letter-partitioned views of english_words, used for
+            phonemic filtering
+    """
+    def __init__(self, english_words=None, permissible_words=None, names=None):
+        """Builds the hash-indexed views from lists of words.
+
+        :param list english_words: Big list of English words.
+        :param list permissible_words: List of legal words of the relevant category.
+        :param list names: List of tokenized responses, i.e. compound words separated by spaces.
+        """
+        self.english_words = frozenset(english_words or [])
+        self.permissible_words = frozenset(permissible_words or [])
+        self.names = frozenset(names or [])
+
+        # names containing 2-5 separate words
+        compound_names = dict((length, set()) for length in range(2, MAX_COMPOUND_LENGTH + 1))
+        for name in self.names:
+            length = len(name.split())
+            if length in compound_names:
+                compound_names[length].add(name)
+        self.compound_names = dict((length, frozenset(compound_names[length])) for length in compound_names)
+
+        # trie of the compound names: each node is a dict mapping the next word to its child node,
+        # and nodes that complete a name map COMPOUND_END to True
+        self.compound_trie = {}
+        for length in compound_names:
+            for name in compound_names[length]:
+                node = self.compound_trie
+                for word in name.split():
+                    node = node.setdefault(word, {})
+                node[COMPOUND_END] = True
+
+        self._words_by_letter = None
+        self._words_by_prefix = {}
+
+    def words_starting_with(self, prefix):
+        """Returns the frozenset of English words that start with the given prefix.
+
+        :param str prefix: a letter, or longer string, that words must start with.
+
+        The English words are partitioned by their first letter the first time this method is
+        called.  Longer prefixes are filtered from the partition of their first letter and cached.
+        """
+        if self._words_by_letter is None:
+            words_by_letter = {}
+            for word in self.english_words:
+                if word:
+                    words_by_letter.setdefault(word[0], set()).add(word)
+            self._words_by_letter = dict((letter, frozenset(words_by_letter[letter]))
+                                         for letter in words_by_letter)
+        if not prefix:
+            return self.english_words
+        if len(prefix) == 1:
+            return self._words_by_letter.get(prefix, frozenset())
+        if prefix not in self._words_by_prefix:
+            self._words_by_prefix[prefix] = frozenset(word for word in self.words_starting_with(prefix[0])
+                                                      if word.startswith(prefix))
+        return self._words_by_prefix[prefix]
+
+    def is_english_word(self, word):
+        """Returns True if the word is in the list of English words."""
+        return word in self.english_words
+
+    def is_permissible_word(self, word):
+        """Returns True if the word is a legal word of the category."""
+        return word in self.permissible_words
+
+    def is_compound_name(self, words):
+        """Returns True if the list of words, joined by spaces, is a multiword name.
+
+        :param list words: list of 2-5 strings.
+        """
+        compound_names = self.compound_names.get(len(words))
+        return compound_names is not None and " ".join(words) in compound_names
+
+    def match_compound_name(self, words, start=0):
+        """Returns the number of words in the longest compound name starting at a position.
+
+        :param list words: list of strings, e.g. the texts of the Units of a response.
+        :param int start: position in words at which the compound name must start.
+        :returns: the number of words (2-5) of the longest compound name that words[start:]
+            begins with, or 0 if it does not begin with one.
+        """
+        node = self.compound_trie
+        longest = 0
+        for length, word in enumerate(words[start:start + MAX_COMPOUND_LENGTH], 1):
+            node = node.get(word)
+            if node is None:
+                break
+            if COMPOUND_END in node:
+                longest = length
+        return longest
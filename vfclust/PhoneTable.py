@@ -0,0 +1,128 @@
+"""
+Columnar storage of the phones of a timed response, and the TIMING_ measures derived from them.
+
+The phones of a TextGrid response are stored once, as an array of phone-class codes (e.g. vowel
+or continuant) and an array of durations.  The durations and counts of the phones of each class
+are summed per word with segment reductions over the phone range of every word, so that the
+timing measures of a set of collections reduce to gathering and summing rows of these arrays,
+rather than walking the phones of every word of every collection again for each measure.
+"""
+import numpy as np
+
+from CollectionEngine import interval_members
+
+__docformat__ = "restructuredtext en"
+
+#code of phones in none of the phone classes
+OTHER = 0
+
+
+def mean_or_none(total, count):
+    """Returns total / count as a float, or None if count is 0."""
+    return float(total / count) if count > 0 else None
+
+
+class PhoneTable(object):
+    """ Class holding the phones of a timed response in arrays.
+
+    Phone i has the class code codes[i] (OTHER, or c + 1 for phone class c) and the duration
+    durations[i].  For word w and phone class c, word_durations[w, c] and word_counts[w, c] are
+    the summed duration and number of the phones of class c aligned to w.
+    """
+
+    def __init__(self, phones, starts, ends, word_ranges, phone_classes):
+        """Initializes a PhoneTable from the phones of a TextGrid.
+
+        :param list phones: label of every phone, without stress markers (see Phone.string).
+        :param starts: start time of every phone.
+        :param ends: end time of every phone.
+        :param word_ranges: k x 2 array of the (start, end) range of phones aligned to each of
+            the k words, e.g. TextGrid.phone_ranges.
+        :param list phone_classes: lists of phone labels, e.g. [vowels, continuants].  Phones
+            in list c get the code c + 1.
+        """
+        class_codes = {}
+        for code, labels in enumerate(phone_classes, 1):
+            for label in labels:
+                class_codes.setdefault(label, code)
+        self.codes = np.array([class_codes.get(phone, OTHER) for phone in phones], dtype=np.int8)
+        self.durations = np.asarray(ends, dtype=np.float64) - np.asarray(starts, dtype=np.float64)
+        self.word_ranges = np.asarray(word_ranges, dtype=np.intp).reshape(-1, 2)
+
+        word_count = len(self.word_ranges)
+        class_count = len(phone_classes)
+        self.word_durations = np.zeros((word_count, class_count))
+        self.word_counts = np.zeros((word_count, class_count), dtype=np.intp)
+        #mean duration of the phones of each class over every word of the response, or None
+        self.response_means = []
+
+        # one entry per phone of each word, in order
+        members, words = interval_members(self.word_ranges)
+        member_codes = self.codes[members]
+        member_durations = self.durations[members]
+        for c in range(class_count):
+            mask = member_codes == c + 1
+            self.word_durations[:, c] = np.bincount(words[mask], weights=member_durations[mask],
+                                                    minlength=word_count)
+            self.word_counts[:, c] = np.bincount(words[mask], minlength=word_count)
+            self.response_means.append(mean_or_none(member_durations[mask].sum(), mask.sum()))
+
+    def unit_totals(self, word_indices):
+        """Returns the summed durations and counts of the phones of each class for a sequence of Units.
+
+        :param word_indices: index of the word of each Unit, e.g. the timed_indices column of a
+            UnitTable.
+        :returns: (durations, counts), two arrays with one row per Unit and one column per class.
+        """
+        word_indices = np.asarray(word_indices, dtype=np.intp)
+        return self.word_durations[word_indices], self.word_counts[word_indices]
+
+
+def collection_timing(intervals, start_times, end_times, phone_durations, phone_counts):
+    """Computes the timing aggregates of a set of collections in a single pass over their Units.
+
+    :param intervals: k x 2 array of the (start, end) interval of Unit indices of each collection.
+    :param start_times: start time of every Unit.
+    :param end_times: end time of every Unit.
+    :param phone_durations: summed duration of the phones of each class of every Unit, as
+        returned by PhoneTable.unit_totals().
+    :param phone_counts: number of phones of each class of every Unit.
+    :returns: dict with:
+        - 'spans': list of the (start, end) time of each collection
+        - 'between_intervals': list of the intervals between consecutive collections, where
+            negative intervals (overlapping collections) are 0
+        - 'between_mean': mean of 'between_intervals', or None
+        - 'within_interval_mean': mean interval between consecutive Units of the same
+            collection, or None
+        - 'phone_means': dict mapping a minimum collection size to the mean duration of the
+            phones of each class in the Units of collections of at least that size (None if
+            there are no such phones), for sizes 1 and 2
+    :rtype : dict
+    """
+    intervals = np.asarray(intervals, dtype=np.intp).reshape(-1, 2)
+    start_times = np.asarray(start_times, dtype=np.float64)
+    end_times = np.asarray(end_times, dtype=np.float64)
+    sizes = intervals[:, 1] - intervals[:, 0]
+    members, owners = interval_members(intervals)
+    timing = {}
+
+    span_starts = start_times[intervals[:, 0]]
+    span_ends = end_times[intervals[:, 1] - 1]
+    timing['spans'] = zip(span_starts.tolist(), span_ends.tolist())
+    between = span_starts[1:] - span_ends[:-1]
+    timing['between_intervals'] = [0 if interval < 0 else interval for interval in between.tolist()]
+    timing['between_mean'] = mean_or_none(np.maximum(between, 0).sum(), len(between))
+
+    # every member but the last of its collection is followed by another in the same collection
+    followed = members[members < intervals[owners, 1] - 1]
+    within = start_times[followed + 1] - end_times[followed]
+    timing['within_interval_mean'] = mean_or_none(within.sum(), len(within))
+
+    timing['phone_means'] = {}
+    for min_size in (1, 2):
+        units = members[sizes[owners] >= min_size]
+        totals = phone_durations[units].sum(axis=0)
+        counts = phone_counts[units].sum(axis=0)
+        timing['phone_means'][min_size] = [mean_or_none(total, count)
+                                           for total, count in zip(totals, counts)]
+    return timing
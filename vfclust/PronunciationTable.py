@@ -0,0 +1,185 @@
+"""
+Memory-mapped table of compact phonetic representations for every word of the English lexicon.
+
+Phonemic clustering only keeps words of the English Open Word List (data/EOWL/english_words.txt),
+so every word that could ever need a pronunciation is known ahead of time.  The table is built
+once, offline, from the modified CMU dictionary (data/modified_cmudict.dat) plus a generated
+pronunciation for every EOWL word missing from it, and is stored as two sorted, fixed-width byte
+string .npy arrays: the words, and their compact phonetic representations.  At runtime the arrays
+are memory-mapped and words are found by binary search, so loading is nearly instant and no words
+have to be transcribed while responses are analyzed.
+
+To build the table, run:
+
+    python PronunciationTable.py
+
+from the vfclust/ directory (or "make pronunciations").
+"""
+import os
+import re
+import sys
+import cPickle as pickle
+
+import numpy as np
+
+__docformat__ = "restructuredtext en"
+
+data_path = os.path.join(os.path.dirname(__file__), 'data/')
+
+MULTIS = ['AA', 'AE', 'AH', 'AO', 'AW', 'AY', 'CH', 'DH', 'EH', 'ER',
+          'EY', 'HH', 'IH', 'IY', 'JH', 'NG', 'OW', 'OY', 'SH',
+          'TH', 'UH', 'UW', 'ZH']
+
+SINGLES = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l',
+           'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w']
+
+#every phoneme of the CMU phone set (without stress), i.e. MULTIS and the single-letter phonemes
+CMU_PHONES = frozenset(MULTIS + ['B', 'D', 'F', 'G', 'K', 'L', 'M', 'N', 'P', 'R', 'S', 'T',
+                                 'V', 'W', 'Y', 'Z'])
+
+
+def compact_phonetic_representation(phonetic_representation):
+    """ Returns a compact phonetic representation given a CMUdict-formatted representation.
+
+    :param list phonetic_representation: a phonetic representation in standard
+        CMUdict formatting, i.e. a list of phonemes like ['HH', 'EH0', 'L', 'OW1']
+    :returns: A string representing a custom phonetic representation, where each phoneme is
+        mapped to a single ascii character.
+    """
+    # Remove numerical stress indicators
+    phonemes = [re.sub('\d+', '', phoneme) for phoneme in phonetic_representation]
+    # Convert multicharacter phone symbols to arbitrary single-character symbols
+    return ''.join([SINGLES[MULTIS.index(phoneme)] if phoneme in MULTIS else phoneme
+                    for phoneme in phonemes])
+
+
+def get_table_paths(directory=data_path):
+    """Returns the paths of the word and pronunciation arrays of the table.
+
+    :param str directory: directory holding the table, by default the supporting data directory.
+    :returns: tuple of (words path, pronunciations path)
+    """
+    return (os.path.join(directory, 'pronunciations_words.npy'),
+            os.path.join(directory, 'pronunciations.npy'))
+
+
+class PronunciationTable(object):
+    """ Class holding sorted arrays of words and their compact phonetic representations.
+
+    A PronunciationTable behaves like the modified CMU dictionary (a read-only dict mapping
+    words to compact phonetic representations) and can be used in its place.
+    """
+
+    def __init__(self, words, pronunciations):
+        """Initializes a table from two arrays of equal length.
+
+        :param words: sorted numpy array of fixed-width byte strings (possibly memory-mapped).
+        :param pronunciations: numpy array of fixed-width byte strings, holding the compact
+            phonetic representation of each word.
+        """
+        self.words = words
+        self.pronunciations = pronunciations
+
+    @classmethod
+    def from_dictionary(cls, pronunciations):
+        """Builds a table from a dictionary mapping words to compact phonetic representations.
+
+        :rtype : PronunciationTable
+        """
+        words = sorted(pronunciations)
+        return cls(np.array(words, dtype=np.string_),
+                   np.array([pronunciations[word] for word in words], dtype=np.string_))
+
+    @classmethod
+    def build(cls, cmudict, english_words, phonetic_transcriber, quiet=False):
+        """Builds a table with the CMU dictionary entries and a pronunciation for every English word.
+
+        :param dict cmudict: modified CMU dictionary, mapping words to compact phonetic representations.
+        :param list english_words: words that must all be in the table.
+        :param phonetic_transcriber: object whose transcribe_words() method returns CMUdict-formatted
+            pronunciations for a list of words, e.g. a LetterToPhoneme.DecisionTree.
+        :param bool quiet: If True, suppresses output to screen.
+        :rtype : PronunciationTable
+        """
+        pronunciations = dict(cmudict)
+        missing_words = sorted(set(word for word in english_words if word not in pronunciations))
+        if not quiet:
+            print "Generating pronunciations for", len(missing_words), "words missing from cmudict..."
+        for word, phonetic_representation in zip(missing_words,
+                                                 phonetic_transcriber.transcribe_words(missing_words)):
+            pronunciations[word] = compact_phonetic_representation(phonetic_representation)
+        return cls.from_dictionary(pronunciations)
+
+    @classmethod
+    def load(cls, directory=data_path, mmap=True):
+        """Loads a table previously written with save().
+
+        :param str directory: directory holding the table, by default the supporting data directory.
+        :param bool mmap: If True (default), the arrays are memory-mapped rather than read.
+        :rtype : PronunciationTable
+        """
+        words_path, pronunciations_path = get_table_paths(directory)
+        mmap_mode = 'r' if mmap else None
+        return cls(np.load(words_path, mmap_mode=mmap_mode),
+                   np.load(pronunciations_path, mmap_mode=mmap_mode))
+
+    @staticmethod
+    def exists(directory=data_path):
+        """Returns True if a table has been built in the given directory."""
+        return all(os.path.isfile(path) for path in get_table_paths(directory))
+
+    def save(self, directory=data_path):
+        """Writes the arrays of the table to the given directory."""
+        words_path, pronunciations_path = get_table_paths(directory)
+        np.save(words_path, np.asarray(self.words))
+        np.save(pronunciations_path, np.asarray(self.pronunciations))
+
+    def index(self, word):
+        """Returns the position of a word in the table, or None if it is not in it."""
+        if not isinstance(word, str):
+            try:
+                word = str(word)
+            except UnicodeError:
+                return None
+        position = int(np.searchsorted(self.words, word))
+        # words longer than the array width are truncated by searchsorted, so check the match
+        if position < len(self.words) and self.words[position] == word:
+            return position
+        return None
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        """Implements 'word in table'."""
+        return self.index(word) is not None
+
+    def __getitem__(self, word):
+        """Returns the compact phonetic representation of a word.  Raises KeyError for unknown words."""
+        position = self.index(word)
+        if position is None:
+            raise KeyError(word)
+        return str(self.pronunciations[position])
+
+    def get(self, word, default=None):
+        """Returns the compact phonetic representation of a word, or default if it is not in the table."""
+        position = self.index(word)
+        if position is None:
+            return default
+        return str(self.pronunciations[position])
+
+
+def main(directory=data_path):
+    """Builds the table from the modified CMU dictionary and the English Open Word List, and saves it."""
+    import LetterToPhoneme
+
+    cmudict = pickle.load(open(os.path.join(directory, 'modified_cmudict.dat'), 'rb'))
+    english_words = open(os.path.join(directory, 'EOWL', 'english_words.txt'), 'r').read().split()
+    table = PronunciationTable.build(cmudict, english_words,
+                                     LetterToPhoneme.get_decision_tree(os.path.join(directory, 'cmudict.0.7a.tree')))
+    table.save(directory)
+    print "Saved", len(table), "pronunciations to", get_table_paths(directory)[1]
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,79 @@
+"""
+Response-level matrix of similarity scores between Units.
+
+Chains, clusters, the adjacent similarity scores printed to screen and the pairwise similarity
+measures all need similarity scores between the same Units of a response.  A SimilarityMatrix
+computes each pair at most once per similarity measure, in batches, and every consumer reads the
+scores from it.
+"""
+import numpy as np
+
+__docformat__ = "restructuredtext en"
+
+
+class SimilarityMatrix(object):
+    """ Class holding the similarity scores between every pair of Units in a response.
+
+    Entry [i, j] holds the score of Unit i compared to Unit j.  Pairs are computed in batches and
+    never twice: adjacent() only needs the band of adjacent pairs, [i, i + 1], but the pairwise
+    similarity measures, computed for every response, need every pair (compute_all()), so in
+    practice the whole matrix is computed once per similarity measure.
+    The scores themselves come from a kernel, a function that takes two integer arrays of
+    equal length (rows and columns) and returns an array with the score of each (row, column) pair.
+    """
+
+    def __init__(self, size, kernel, symmetric=True):
+        """Initializes an empty SimilarityMatrix.
+
+        :param int size: number of Units in the response.
+        :param kernel: function computing the scores of a batch of pairs, see above.
+        :param bool symmetric: If True, the score of [j, i] is assumed to be equal to the score
+            of [i, j] and is not computed separately.
+        """
+        self.size = size
+        self.kernel = kernel
+        self.symmetric = symmetric
+        self.scores = np.zeros((size, size))
+        self.computed = np.zeros((size, size), dtype=bool)
+        self.all_computed = size < 2
+
+    def compute_pairs(self, rows, cols):
+        """Computes the scores of the given pairs that have not been computed yet.
+
+        :param rows: integer array of row indices.
+        :param cols: integer array of column indices, of the same length as rows.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        cols = np.asarray(cols, dtype=np.intp)
+        missing = ~self.computed[rows, cols]
+        rows, cols = rows[missing], cols[missing]
+        if len(rows) == 0:
+            return
+        scores = np.asarray(self.kernel(rows, cols), dtype=np.float64)
+        self.scores[rows, cols] = scores
+        self.computed[rows, cols] = True
+        if self.symmetric:
+            self.scores[cols, rows] = scores
+            self.computed[cols, rows] = True
+
+    def compute_all(self):
+        """Computes the scores of every pair of different Units that has not been computed yet."""
+        if self.all_computed:
+            return
+        if self.symmetric:
+            rows, cols = np.triu_indices(self.size, 1)
+        else:
+            rows, cols = np.nonzero(~np.eye(self.size, dtype=bool))
+        self.compute_pairs(rows, cols)
+        self.all_computed = True
+
+    def adjacent(self):
+        """Returns an array with the n - 1 scores of adjacent pairs, [i, i + 1]."""
+        rows = np.arange(self.size - 1, dtype=np.intp) if self.size > 1 else np.zeros(0, dtype=np.intp)
+        self.compute_pairs(rows, rows + 1)
+        return self.scores[rows, rows + 1]
+
+    def upper_triangle(self):
+        """Returns an array with the scores of every pair [i, j] with i < j, in row-major order."""
+        self.compute_all()
+        return self.scores[np.triu_indices(self.size, 1)]
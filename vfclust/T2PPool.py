@@ -0,0 +1,252 @@
+"""
+Pool of long-lived t2p processes, for transcribing words with the reference t2p binary.
+
+By default VFClust transcribes words missing from the CMU dictionary with the in-process
+decision tree of LetterToPhoneme.  Deployments that must use the reference t2p binary
+(t2p/t2p.c) can use a T2PPool instead: each worker is a "t2p -transcribe tree -" process that
+loads the decision tree once and then reads words from its standard input, one per line, for as
+long as it lives.  Words are sent to the workers in batches over pipes, and every batch is
+subject to a timeout; a worker that crashes or times out is restarted and its batch retried.
+
+t2p writes its output through stdio, which is block-buffered when stdout is a pipe, so workers
+are started under "stdbuf -oL" to make t2p flush every line.  Where stdbuf is not available,
+each batch is written to a fresh t2p process whose input is then closed, which still loads the
+tree once per batch rather than once per word.
+"""
+import os
+import select
+import subprocess
+import threading
+import time
+import Queue
+from errno import EAGAIN, EINTR
+from fcntl import fcntl, F_GETFL, F_SETFL
+from distutils.spawn import find_executable
+
+__docformat__ = "restructuredtext en"
+
+t2p_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 't2p', 't2p'))
+data_path = os.path.join(os.path.dirname(__file__), 'data/')
+
+#longest word given to t2p, which keeps at most 100 graphemes (including boundaries) per word
+MAX_WORD_LENGTH = 90
+
+
+class T2PError(Exception):
+    """Raised when a batch of words cannot be transcribed by t2p."""
+    pass
+
+
+class T2PWorker(object):
+    """ Class managing a single t2p process and the transcription of batches of words by it."""
+
+    def __init__(self, command, timeout=10, persistent=True):
+        """Initializes a worker; the t2p process is started on the first batch.
+
+        :param list command: the command line of the t2p process, reading words from stdin.
+        :param float timeout: number of seconds a batch may take before the process is killed.
+        :param bool persistent: If True, the process is expected to flush every line of output
+            and is kept running between batches.  Otherwise, its input is closed after each batch
+            and a new process is started for the next one.
+        """
+        self.command = command
+        self.timeout = timeout
+        self.persistent = persistent
+        self.process = None
+
+    def start(self):
+        """Starts the t2p process, if it is not running."""
+        if self.process is not None and self.process.poll() is None:
+            return
+        with open(os.devnull, 'w') as devnull:
+            self.process = subprocess.Popen(self.command,
+                                            stdin=subprocess.PIPE,
+                                            stdout=subprocess.PIPE,
+                                            stderr=devnull,
+                                            close_fds=True)
+        # writes must not block while t2p is waiting for its output to be read
+        stdin = self.process.stdin.fileno()
+        fcntl(stdin, F_SETFL, fcntl(stdin, F_GETFL) | os.O_NONBLOCK)
+
+    def stop(self):
+        """Stops the t2p process, killing it if necessary."""
+        process, self.process = self.process, None
+        if process is None:
+            return
+        for pipe in (process.stdin, process.stdout):
+            try:
+                pipe.close()
+            except (IOError, OSError):
+                pass
+        if process.poll() is None:
+            try:
+                process.kill()
+            except OSError:
+                pass
+        process.wait()
+
+    def transcribe_words(self, words):
+        """Returns the t2p output for a batch of words.
+
+        :param list words: non-empty words without whitespace, one per line of t2p input.
+        :return: A list with one list of phonemes per word.
+        :raises T2PError: if the process exits early, times out or returns unexpected output.
+            The process is stopped in that case.
+        """
+        if not words:
+            return []
+        self.start()
+        try:
+            lines = self.communicate(''.join(word + '\n' for word in words), len(words))
+        except:
+            self.stop()
+            raise
+        if not self.persistent:
+            self.stop()
+
+        phonetic_representations = []
+        for word, line in zip(words, lines):
+            output = line.split()
+            if not output or output[0] != word:
+                self.stop()
+                raise T2PError("Unexpected t2p output for " + word + ": " + line)
+            phonetic_representations.append(output[1:])
+        return phonetic_representations
+
+    def communicate(self, data, line_count):
+        """Writes data to the process and reads line_count lines of output, within the timeout."""
+        stdin = self.process.stdin.fileno()
+        stdout = self.process.stdout.fileno()
+        deadline = time.time() + self.timeout
+        output = []
+        received = 0
+        writing = [stdin]
+        if not data:
+            writing = []
+        while received < line_count:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise T2PError("t2p did not answer within " + str(self.timeout) + " seconds")
+            try:
+                readable, writable, _ = select.select([stdout], writing, [], remaining)
+            except select.error as e:
+                if e.args[0] == EINTR:
+                    continue
+                raise
+            if writable:
+                try:
+                    written = os.write(stdin, data)
+                except OSError as e:
+                    if e.errno == EAGAIN:
+                        continue
+                    raise T2PError("t2p stopped reading its input")
+                data = data[written:]
+                if not data:
+                    writing = []
+                    if not self.persistent:
+                        # t2p only flushes its output when it exits
+                        self.process.stdin.close()
+            if readable:
+                chunk = os.read(stdout, 65536)
+                if not chunk:
+                    raise T2PError("t2p exited with code " + str(self.process.wait()))
+                output.append(chunk)
+                received += chunk.count('\n')
+        return ''.join(output).split('\n')[:line_count]
+
+
+class T2PPool(object):
+    """ Class holding a pool of T2PWorkers and distributing batches of words among them.
+
+    A T2PPool can be used wherever a LetterToPhoneme.DecisionTree is, e.g. as the phonetic
+    transcriber of a VFClustAnalyzer.
+    """
+
+    def __init__(self, workers=2, tree_path=None, batch_size=256, timeout=10, retries=2, executable=None):
+        """Initializes a pool of t2p workers.
+
+        :param int workers: number of t2p processes.
+        :param str tree_path: (optional) path of the .tree file. Defaults to data/cmudict.0.7a.tree
+        :param int batch_size: largest number of words sent to a worker at once.
+        :param float timeout: number of seconds a batch may take before its worker is restarted.
+        :param int retries: number of times a failed batch is retried on a restarted worker.
+        :param str executable: (optional) path of the t2p binary. Defaults to t2p/t2p
+        """
+        if tree_path is None:
+            tree_path = os.path.join(data_path, 'cmudict.0.7a.tree')
+        command = [executable or t2p_path, '-transcribe', tree_path, '-']
+        stdbuf = find_executable('stdbuf')
+        if stdbuf:
+            command = [stdbuf, '-oL'] + command
+        self.batch_size = max(1, int(batch_size))
+        self.retries = retries
+        self.workers = [T2PWorker(command, timeout=timeout, persistent=bool(stdbuf))
+                        for _ in range(max(1, int(workers)))]
+
+    def close(self):
+        """Stops every worker of the pool."""
+        for worker in self.workers:
+            worker.stop()
+
+    def transcribe(self, word):
+        """Returns the phonetic representation of a word, in CMUdict format."""
+        return self.transcribe_words([word])[0]
+
+    def transcribe_words(self, words):
+        """Returns the phonetic representations of a list of words.
+
+        :param list words: words to be phoneticized.
+        :return: A list with one list of phonemes per word.
+
+        Like t2p, only the first token of each word is transcribed.  Words that t2p would stop at
+        or crash on (empty words and words longer than MAX_WORD_LENGTH) get an empty
+        representation without being sent to t2p.
+        """
+        tokens = [(word.split() or [''])[0] for word in words]
+        unique_tokens = sorted(set(token for token in tokens if 0 < len(token) <= MAX_WORD_LENGTH))
+        batches = [unique_tokens[i:i + self.batch_size]
+                   for i in range(0, len(unique_tokens), self.batch_size)]
+
+        transcriptions = {}
+        if len(batches) <= 1 or len(self.workers) == 1:
+            for batch in batches:
+                transcriptions.update(self.run_batch(self.workers[0], batch))
+        else:
+            pending = Queue.Queue()
+            for batch in batches:
+                pending.put(batch)
+            errors = []
+
+            def work(worker):
+                while not errors:
+                    try:
+                        batch = pending.get_nowait()
+                    except Queue.Empty:
+                        return
+                    try:
+                        transcriptions.update(self.run_batch(worker, batch))
+                    except T2PError as e:
+                        errors.append(e)
+
+            threads = [threading.Thread(target=work, args=(worker,))
+                       for worker in self.workers[:len(batches)]]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            if errors:
+                raise errors[0]
+
+        return [list(transcriptions.get(token, [])) for token in tokens]
+
+    def run_batch(self, worker, batch):
+        """Transcribes a batch of words on a worker, restarting it on failure.
+
+        :return: dict mapping each word of the batch to its list of phonemes.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                return dict(zip(batch, worker.transcribe_words(batch)))
+            except T2PError:
+                if attempt == self.retries:
+                    raise
@@ -0,0 +1,195 @@
+"""
+On-disk cache of parsed TextGrids.
+
+Cohorts are often re-scored many times (e.g. with new thresholds or measures), and each run
+would otherwise parse the same TextGrid files again.  A TextGridCache stores the word and phone
+tiers of each parsed TextGrid, and the range of phones aligned to each word, as the arrays of a
+compressed .npz file in a cache directory.  The name of the file is derived from the path,
+size, modification time and content hash of the TextGrid and the tiers selected from it, so a
+changed file never matches an old entry.  Reading an entry skips the text parsing and phone
+alignment entirely.
+
+The total size of the cache directory is capped: when it is exceeded, the entries that were
+least recently used are deleted.
+"""
+import os
+import io
+import hashlib
+import tempfile
+
+import numpy as np
+
+from TextGridParser import TextGrid, Tier, align_phones
+
+__docformat__ = "restructuredtext en"
+
+#default cap on the total size of the cache directory, in bytes
+DEFAULT_MAX_SIZE = 100 * 2 ** 20
+
+#version of the layout of the cache entries, part of their key
+CACHE_VERSION = 1
+
+CACHE_SUFFIX = '.npz'
+
+
+def tier_arrays(prefix, tier):
+    """Returns a dict of the arrays storing a Tier, with keys starting with prefix."""
+    return {prefix + 'header': np.array([tier.name, tier.tier_class]),
+            prefix + 'bounds': np.array([tier.xmin, tier.xmax], dtype=np.float64),
+            prefix + 'starts': np.array(tier.starts, dtype=np.float64),
+            prefix + 'ends': np.array(tier.ends, dtype=np.float64),
+            prefix + 'texts': np.array(tier.texts)}
+
+
+def tier_from_arrays(prefix, arrays):
+    """Returns the Tier stored by tier_arrays() in a dict (or NpzFile) of arrays."""
+    name, tier_class = arrays[prefix + 'header'].tolist()
+    xmin, xmax = arrays[prefix + 'bounds'].tolist()
+    tier = Tier(name, xmin, xmax, tier_class)
+    tier.starts.fromlist(arrays[prefix + 'starts'].tolist())
+    tier.ends.fromlist(arrays[prefix + 'ends'].tolist())
+    tier.texts = arrays[prefix + 'texts'].tolist()
+    return tier
+
+
+class TextGridCache(object):
+    """ Class caching the parsed tiers of TextGrid files in a directory of .npz files."""
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        """Initializes a TextGridCache, creating its directory if necessary.
+
+        :param str directory: directory holding the cache entries.
+        :param int max_size: (optional) cap on the total size of the entries, in bytes.
+        """
+        self.directory = directory
+        self.max_size = max_size
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        #total size of the entries, scanned from the directory when first needed and then kept
+        #up to date as entries are written, so that the directory is only scanned again when
+        #the cap is exceeded (entries written by other processes are counted at that point)
+        self.total_size = None
+
+    def entry_path(self, path, data, word_tier=None, phone_tier=None):
+        """Returns the path of the cache entry of a TextGrid file.
+
+        :param str path: path of the TextGrid file.
+        :param str data: contents of the file.
+        :param str word_tier: (optional) name of the tier of words, as passed to TextGrid.
+        :param str phone_tier: (optional) name of the tier of phones, as passed to TextGrid.
+        """
+        stat = os.stat(path)
+        key = "\0".join([str(CACHE_VERSION), os.path.abspath(path), str(stat.st_size),
+                         repr(stat.st_mtime), hashlib.sha1(data).hexdigest(),
+                         repr(word_tier), repr(phone_tier)])
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest() + CACHE_SUFFIX)
+
+    def load(self, path, word_tier=None, phone_tier=None):
+        """Returns the TextGrid of a file, from the cache if possible.
+
+        On a miss, the file is parsed, its phones are aligned to its words and the result is
+        added to the cache.  Takes the same tier names as TextGrid.
+
+        :param str path: path of the TextGrid file.
+        :rtype : TextGrid
+        """
+        with open(path, 'rb') as infile:
+            data = infile.read()
+        entry = self.entry_path(path, data, word_tier, phone_tier)
+
+        textgrid = self.read_entry(entry)
+        if textgrid is None:
+            textgrid = TextGrid(io.BytesIO(data), word_tier=word_tier, phone_tier=phone_tier)
+            textgrid.phone_ranges = align_phones(textgrid.word_tier, textgrid.phone_tier)
+            entry_size = self.write_entry(entry, textgrid)
+            if entry_size is not None:
+                if self.total_size is None:
+                    self.total_size = self.size()
+                else:
+                    self.total_size += entry_size
+                if self.total_size > self.max_size:
+                    self.evict(keep=entry)
+        return textgrid
+
+    def read_entry(self, entry):
+        """Returns the TextGrid stored in a cache entry, or None if it is missing or unreadable.
+
+        Reading an entry marks it as recently used.  Unreadable entries are deleted.
+        """
+        if not os.path.exists(entry):
+            return None
+        try:
+            arrays = np.load(entry, allow_pickle=False)
+            try:
+                phone_ranges = arrays['phone_ranges'].astype(np.intp).reshape(-1, 2)
+                textgrid = TextGrid.from_tiers(tier_from_arrays('word_', arrays),
+                                               tier_from_arrays('phone_', arrays),
+                                               phone_ranges)
+            finally:
+                arrays.close()
+            os.utime(entry, None)
+        except (IOError, OSError, ValueError, KeyError):
+            self.remove(entry)
+            return None
+        return textgrid
+
+    def write_entry(self, entry, textgrid):
+        """Stores the tiers and phone ranges of a TextGrid in a cache entry.
+
+        The entry is written to a temporary file first and then renamed, so that concurrent
+        processes sharing the cache never read a partly written entry.
+
+        :returns: the size of the entry in bytes, or None if it could not be written.
+        """
+        arrays = tier_arrays('word_', textgrid.word_tier)
+        arrays.update(tier_arrays('phone_', textgrid.phone_tier))
+        arrays['phone_ranges'] = np.asarray(textgrid.phone_ranges, dtype=np.int64)
+        handle, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as outfile:
+                np.savez_compressed(outfile, **arrays)
+            os.rename(temp_path, entry)
+            return os.path.getsize(entry)
+        except (IOError, OSError):
+            #the cache is only an optimization: failing to write an entry is not an error
+            self.remove(temp_path)
+            return None
+
+    def entries(self):
+        """Returns a list of (last use time, size, path) of the entries in the cache, oldest first."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(CACHE_SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  #removed by another process
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def size(self):
+        """Returns the total size of the entries in the cache, in bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        """Deletes the least recently used entries until the cache is no larger than max_size.
+
+        :param str keep: (optional) path of an entry never to delete, e.g. the one just written.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            if path != keep:
+                self.remove(path)
+                total -= size
+        self.total_size = total
+
+    def remove(self, path):
+        """Deletes a file of the cache, if it still exists."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
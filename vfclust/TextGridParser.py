@@ -1,59 +1,406 @@
 import re
+import codecs
+import struct
+from array import array
+from mmap import mmap
+
+import numpy as np
+
+#size of the chunks read from file objects
+CHUNK_SIZE = 65536
+
+#first bytes of a TextGrid in Praat's binary format
+BINARY_HEADER = "ooBinaryFile"
+
+#kinds of tokens in a Praat text file
+STRING = 0
+NUMBER = 1
+FLAG = 2
+
+# A Praat text file is a sequence of strings ("..." with "" for a quote), numbers and flags
+# (<exists>); everything else, e.g. "xmin =" or "intervals [1]:", is a label and is skipped.
+# A string or number that reaches the end of the data read so far may continue in the next chunk.
+TOKEN = re.compile(r'"((?:[^"]|"")*)("|\Z)'
+                   r'|(<[^\s>]*>)'
+                   r'|([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(?=\s|\Z)'
+                   r'|\S+')
+
+
+def iter_tokens(source, chunk_size=CHUNK_SIZE):
+    """Yields the (kind, value) tokens of a Praat text file in a single pass.
+
+    :param source: a file object (read in chunks) or a buffer holding the whole file, e.g. an
+        mmap.mmap or a str.
+    :param int chunk_size: number of bytes read from a file object at a time.
+
+    Values of STRING tokens are str, with "" unescaped; values of NUMBER tokens are float, parsed
+    from the full text of the number; values of FLAG tokens are str, e.g. '<exists>'.
+    """
+    if hasattr(source, 'read') and not isinstance(source, mmap):
+        chunks = iter(lambda: source.read(chunk_size), '')
+    else:
+        # the regular expression scans the buffer in place
+        chunks = iter([source])
+    pending = ''
+    at_end = False
+    while not at_end:
+        chunk = next(chunks, None)
+        if chunk is None:
+            at_end = True
+            data = pending
+        elif pending:
+            data = pending + chunk
+        else:
+            data = chunk
+        pending = ''
+        for match in TOKEN.finditer(data):
+            if not at_end and match.end() == len(data):
+                # the token may continue in the next chunk
+                pending = data[match.start():]
+                break
+            string, closing_quote, flag, number = match.groups()
+            if string is not None:
+                if not closing_quote:
+                    raise ValueError("Unterminated string in TextGrid")
+                yield STRING, string.replace('""', '"')
+            elif number is not None:
+                yield NUMBER, float(number)
+            elif flag is not None:
+                yield FLAG, flag
+
+
+class Tier(object):
+    """ Class holding the intervals of a TextGrid tier in arrays.
+
+    Interval i runs from starts[i] to ends[i], with the label texts[i].  The points of a point
+    tier (TextTier) are stored as intervals whose start and end are the time of the point.
+    """
+
+    def __init__(self, name, xmin, xmax, tier_class="IntervalTier"):
+
+        self.name = name
+        self.xmin = xmin
+        self.xmax = xmax
+        self.tier_class = tier_class
+        self.starts = array('d')
+        self.ends = array('d')
+        self.texts = []
+
+    def __len__(self):
+
+        return len(self.texts)
+
+    def __iter__(self):
+        """Yields the (start, end, text) of every interval."""
+        return iter(zip(self.starts, self.ends, self.texts))
+
+    def append(self, start, end, text):
+
+        self.starts.append(start)
+        self.ends.append(end)
+        self.texts.append(text)
+
+
+class TokenReader(object):
+    """ Class reading typed values from a stream of tokens."""
+
+    def __init__(self, tokens):
+
+        self.tokens = iter(tokens)
+
+    def next(self, kind=None):
+        """Returns the value of the next token, checking its kind if given."""
+        try:
+            token_kind, value = next(self.tokens)
+        except StopIteration:
+            raise ValueError("Unexpected end of TextGrid")
+        if kind is not None and token_kind != kind:
+            raise ValueError("Unexpected token in TextGrid: " + repr(value))
+        return value
+
+    def number(self):
+
+        return self.next(NUMBER)
+
+    def string(self):
+
+        return self.next(STRING)
+
+
+class PrefixedFile(object):
+    """ Class reading from a file object, after returning bytes already read from it."""
+
+    def __init__(self, prefix, source):
+
+        self.prefix = prefix
+        self.source = source
+
+    def read(self, size=-1):
+
+        if not self.prefix:
+            return self.source.read(size)
+        if size < 0:
+            data, self.prefix = self.prefix + self.source.read(), ''
+            return data
+        data, self.prefix = self.prefix[:size], self.prefix[size:]
+        if len(data) < size:
+            data += self.source.read(size - len(data))
+        return data
+
+
+class BufferFile(object):
+    """ Class reading from a buffer (e.g. an mmap.mmap) without changing its position."""
+
+    def __init__(self, buffer):
+
+        self.buffer = buffer
+        self.position = 0
+
+    def read(self, size=-1):
+
+        end = len(self.buffer) if size < 0 else self.position + size
+        data = self.buffer[self.position:end]
+        self.position += len(data)
+        return data
+
+
+def read_tiers(source):
+    """Yields the tiers of a TextGrid in any of Praat's formats, reading it in a single pass.
+
+    :param source: a file object, or a buffer holding the whole file, e.g. an mmap.mmap or a str.
+    :returns: a generator of Tier objects, in the order of the file.
+
+    The format is detected from the first bytes: binary files start with "ooBinaryFile", and
+    text files (long or short) written in UTF-16 start with a byte order mark.
+    """
+    if hasattr(source, 'read') and not isinstance(source, mmap):
+        head = source.read(len(BINARY_HEADER))
+        stream = PrefixedFile(head, source)
+    else:
+        head = source[:len(BINARY_HEADER)]
+        stream = source
+    if head == BINARY_HEADER:
+        if stream is source:
+            stream = BufferFile(source)
+        return read_binary_tiers(stream)
+    if head[:2] in (codecs.BOM_UTF16_BE, codecs.BOM_UTF16_LE):
+        if stream is source:
+            stream = BufferFile(source)
+        stream = codecs.getreader('utf-16')(stream)
+    return read_text_tiers(stream)
+
+
+def read_text_tiers(source):
+    """Yields the tiers of a TextGrid in Praat's text format, long or short.
+
+    :param source: a file object or buffer (see iter_tokens()).
+    :returns: a generator of Tier objects, in the order of the file; each is yielded as soon as
+        its last interval has been read.
+    """
+    reader = TokenReader(iter_tokens(source))
+    if reader.string() != "ooTextFile" or reader.string() != "TextGrid":
+        raise ValueError("Not a TextGrid text file")
+    reader.number()  # xmin
+    reader.number()  # xmax
+    if reader.next() != '<exists>':
+        # the TextGrid has no tiers
+        return
+    for _ in range(int(reader.number())):
+        tier_class = reader.string()
+        tier = Tier(reader.string(), reader.number(), reader.number(), tier_class)
+        size = int(reader.number())
+        if tier_class == "IntervalTier":
+            for _ in range(size):
+                start = reader.number()
+                end = reader.number()
+                tier.append(start, end, reader.string())
+        elif tier_class == "TextTier":
+            for _ in range(size):
+                time = reader.number()
+                tier.append(time, time, reader.string())
+        else:
+            raise ValueError("Unknown tier class: " + tier_class)
+        yield tier
+
+
+class BinaryReader(object):
+    """ Class reading the big-endian values of a Praat binary file."""
+
+    def __init__(self, source):
+
+        self.source = source
+
+    def read(self, size):
+
+        data = self.source.read(size)
+        if len(data) < size:
+            raise ValueError("Unexpected end of TextGrid")
+        return data
+
+    def byte(self):
+
+        return ord(self.read(1))
+
+    def int32(self):
+
+        return struct.unpack('>i', self.read(4))[0]
+
+    def uint16(self):
+
+        return struct.unpack('>H', self.read(2))[0]
+
+    def double(self):
+
+        return struct.unpack('>d', self.read(8))[0]
+
+    def w8(self):
+        """Reads a string with a one-byte length; 0xFF marks a UTF-16 string."""
+        length = self.byte()
+        if length == 0xFF:
+            return self.read(2 * self.byte()).decode('utf-16-be')
+        return self.read(length)
+
+    def w16(self):
+        """Reads a string with a two-byte length; 0xFFFF marks a UTF-16 string."""
+        length = self.uint16()
+        if length == 0xFFFF:
+            return self.read(2 * self.uint16()).decode('utf-16-be')
+        return self.read(length)
+
+
+def read_binary_tiers(source):
+    """Yields the tiers of a TextGrid in Praat's binary format.
+
+    :param source: a file object.
+
+    After the header and the object class come the xmin and xmax of the TextGrid, a byte telling
+    whether it has tiers, and the number of tiers.  Each tier is its class and name, its xmin,
+    xmax and number of intervals, and then the xmin, xmax and text of every interval (or the time
+    and mark of every point).
+    """
+    reader = BinaryReader(source)
+    if reader.read(len(BINARY_HEADER)) != BINARY_HEADER or reader.w8() != "TextGrid":
+        raise ValueError("Not a TextGrid binary file")
+    reader.double()  # xmin
+    reader.double()  # xmax
+    if not reader.byte():
+        # the TextGrid has no tiers
+        return
+    for _ in range(reader.int32()):
+        tier_class = reader.w8()
+        name = reader.w16()
+        tier = Tier(name, reader.double(), reader.double(), tier_class)
+        size = reader.int32()
+        if tier_class == "IntervalTier":
+            for _ in range(size):
+                start, end = struct.unpack('>dd', reader.read(16))
+                tier.append(start, end, reader.w16())
+        elif tier_class == "TextTier":
+            for _ in range(size):
+                time = reader.double()
+                tier.append(time, time, reader.w16())
+        else:
+            raise ValueError("Unknown tier class: " + tier_class)
+        yield tier
+
+
+def align_phones(word_tier, phone_tier):
+    """Returns the range of phones of the phone tier that lie within each word of the word tier.
+
+    :param Tier word_tier: tier of words.
+    :param Tier phone_tier: tier of phones, sorted by time (as Praat writes interval tiers).
+    :returns: k x 2 integer array with the half-open (start, end) range of phone indices of each
+        of the k words, i.e. the phones whose start and end times are within those of the word.
+
+    Phones are sorted by both start and end time, so the phones starting at or after the start
+    of a word are a suffix of the tier, and those ending at or before its end a prefix; the phones
+    of the word are where the two overlap, found with two binary searches.
+    """
+    phone_starts = np.array(phone_tier.starts, dtype=np.float64)
+    phone_ends = np.array(phone_tier.ends, dtype=np.float64)
+    if np.any(np.diff(phone_starts) < 0) or np.any(np.diff(phone_ends) < 0):
+        raise ValueError("Phone intervals are not sorted by time")
+    first = np.searchsorted(phone_starts, np.array(word_tier.starts, dtype=np.float64), 'left')
+    last = np.searchsorted(phone_ends, np.array(word_tier.ends, dtype=np.float64), 'right')
+    return np.column_stack((first, np.maximum(first, last))).astype(np.intp).reshape(-1, 2)
+
 
 class TextGrid(object):
-    
-    def __init__(self, textgrid):
+
+    def __init__(self, textgrid, word_tier=None, phone_tier=None):
         """Extract word and phone intervals from a TextGrid.
-        
+
         These word and phone intervals contain the words and phones themselves,
         as well as their respective start and end times in the audio recording.
-        
+        The TextGrid may be in Praat's long or short text format, or binary.
+
+        :param textgrid: path of a .TextGrid file, or a file object or mmap.mmap of one.
+        :param str word_tier: (optional) name of the tier of words. Defaults to the first tier.
+        :param str phone_tier: (optional) name of the tier of phones. Defaults to the second tier,
+            if any.
         """
-        textgrid = open(textgrid, 'r').read()
-
-        # Extract word intervals from TextGrid
-        self.word_intervals = textgrid[textgrid.index('intervals [1]:'):textgrid.index('item [2]:')]
-        self.word_intervals = self.word_intervals.split('\"\n')
-        del self.word_intervals[-1]
-        self.word_intervals = [interval + '$' for interval in 
-                               self.word_intervals]
-        
-        # Extract phone intervals from TextGrid
-        self.phone_intervals = textgrid[textgrid.index('item [2]:'):]
-        self.phone_intervals = self.phone_intervals[self.phone_intervals.
-                                                    index('intervals [1]'):]
-        self.phone_intervals = self.phone_intervals.split('\"\n')
-        del self.phone_intervals[-1]
-        self.phone_intervals = [interval + '$' for interval in 
-                                self.phone_intervals]
-    
+        if isinstance(textgrid, basestring):
+            with open(textgrid, 'rb') as infile:
+                self.tiers = list(read_tiers(infile))
+        else:
+            self.tiers = list(read_tiers(textgrid))
+        if not self.tiers:
+            raise ValueError("TextGrid has no tiers")
+
+        if word_tier is None:
+            self.word_tier = self.tiers[0]
+        else:
+            self.word_tier = self.get_tier(word_tier)
+        if phone_tier is not None:
+            self.phone_tier = self.get_tier(phone_tier)
+        elif len(self.tiers) > 1:
+            self.phone_tier = self.tiers[1]
+        else:
+            self.phone_tier = Tier("phone", 0, 0)
+        # range of phones of each word, computed by parse_words()
+        self.phone_ranges = None
+
+
+    @classmethod
+    def from_tiers(cls, word_tier, phone_tier, phone_ranges=None):
+        """Returns a TextGrid made of already parsed tiers, e.g. read from a TextGridCache.
+
+        :param Tier word_tier: tier of words.
+        :param Tier phone_tier: tier of phones.
+        :param phone_ranges: (optional) range of phones of each word, as returned by align_phones().
+        """
+        textgrid = cls.__new__(cls)
+        textgrid.tiers = [word_tier, phone_tier]
+        textgrid.word_tier = word_tier
+        textgrid.phone_tier = phone_tier
+        textgrid.phone_ranges = phone_ranges
+        return textgrid
+
+
+    def get_tier(self, name):
+        """Returns the first tier with the given name.  Raises ValueError if there is none."""
+        for tier in self.tiers:
+            if tier.name == name:
+                return tier
+        raise ValueError("TextGrid has no tier named " + repr(name) + "; its tiers are " +
+                         ", ".join(repr(tier.name) for tier in self.tiers))
 
 
     def parse_phones(self):
         """Parse TextGrid phone intervals.
-        
+
         This method parses the phone intervals in a TextGrid to extract each
         phone and each phone's start and end times in the audio recording. For
         each phone, it instantiates the class Phone(), with the phone and its
         start and end times as attributes of that class instance.
-        
+
         """
-        phones = []
-        
-        for i in self.phone_intervals:
-            start = float(i[i.index('xmin = ')+7:
-                            i.index('xmin = ')+12].strip('\t').strip('\n'))
-            end = float(i[i.index('xmax = ')+7:
-                          i.index('xmax = ')+12].strip('\t').strip('\n'))
-            phone = i[i.index('\"')+1:i.index("$")]
-            phones.append(Phone(phone, start, end))
-            
-        return phones
-    
-    
+        return [Phone(phone, start, end) for start, end, phone in self.phone_tier]
+
+
     def parse_words(self):
         """Parse TextGrid word intervals.
-        
+
         This method parses the word intervals in a TextGrid to extract each
         word and each word's start and end times in the audio recording. For
         each word, it instantiates the class Word(), with the word and its
@@ -61,56 +408,51 @@ class TextGrid(object):
         appends the class instance's attribute 'phones' for each phone that
         occurs in that word. (It does this by checking which phones' start and
         end times are subsumed by the start and end times of the word.)
-        
+
+        The phones of word i are self.phones[start:end], where (start, end) is
+        self.phone_ranges[i] and self.phones is the list returned by parse_phones().
+
         """
-        phones = self.parse_phones()
-        words = []
-        
-        for i in self.word_intervals:
-            start = float(i[i.index('xmin = ')+7:
-                            i.index('xmin = ')+12].strip('\t').strip('\n'))
-            end = float(i[i.index('xmax = ')+7:
-                          i.index('xmax = ')+12].strip('\t').strip('\n'))
-            word = i[i.index('\"')+1:i.index("$")]
-            words.append(Word(word, start, end))
-            
-        for word in words:
-            for phone in phones:
-                if phone.start >= word.start and phone.end <= word.end:
-                    word.phones.append(phone)
-            
+        phones = self.phones = self.parse_phones()
+        words = [Word(word, start, end) for start, end, word in self.word_tier]
+
+        if self.phone_ranges is None:
+            self.phone_ranges = align_phones(self.word_tier, self.phone_tier)
+        for word, (start, end) in zip(words, self.phone_ranges):
+            word.phones = phones[start:end]
+
         return words
 
 
 
 class Word(object):
-    
+
     def __init__(self, word, start, end):
-        
+
         self.string = word.lower()
         self.start = start
         self.end = end
         self.duration = end-start
-        
+
         self.phones = []
-        
-    
+
+
     def __str__(self):
-        
+
         return " ,".join([self.string, str(self.start), str(self.end)])
 
 
 
 class Phone(object):
-    
+
     def __init__(self, phone, start, end):
-        
+
         self.string = re.sub('\d+', '', phone)
         self.start = start
         self.end = end
         self.duration = end-start
-        
-    
+
+
     def __str__(self):
-        
-        return self.string
\ No newline at end of file
+
+        return self.string
@@ -0,0 +1,90 @@
+"""
+Classification of the tokens of a response for the COUNT_ measures.
+
+Every token of a response gets one label (permissible word, exact or stem repetition, examiner
+word, etc.), decided in constant time from hashed sets of the words and stems said so far.  The
+labels are stored as small integer codes in an array, from which both the label table and the
+COUNT_ measures are derived.
+"""
+from array import array
+
+import numpy as np
+
+__docformat__ = "restructuredtext en"
+
+#labels of tokens, indexed by their code
+PERMISSIBLE_WORD = 0
+EXACT_REPETITION = 1
+STEM_REPETITION = 2
+EXAMINER_WORD = 3
+WORD_FRAGMENT = 4
+FILLED_PAUSE = 5
+ASIDE = 6
+LABELS = ['PERMISSIBLE WORD', 'EXACT REPETITION', 'STEM REPETITION', 'EXAMINER WORD',
+          'WORD FRAGMENT', 'FILLED PAUSE', 'ASIDE']
+
+#tokens that are neither words nor counted, e.g. silences and noises
+IGNORED_TOKENS = frozenset(['!sil', 't_noise', 't_cough', 't_lipsmack', 't_breath'])
+
+
+class TokenClassifier(object):
+    """ Class labelling the tokens of a response, in order, and counting the labels."""
+
+    def __init__(self, is_permissible, stem):
+        """Initializes a TokenClassifier for one response.
+
+        :param is_permissible: function returning True if a token is a permissible word, i.e. it
+            meets the criteria of the fluency task.
+        :param stem: function returning the stem of a permissible word, e.g. WordForms.stem
+        """
+        self.is_permissible = is_permissible
+        self.stem = stem
+        self.words_said = set()
+        self.stems_said = set()
+        self.words = []
+        self.codes = array('b')
+
+    def classify(self, word):
+        """Labels the next token of the response.
+
+        :param str word: text of the token.
+        :returns: the label code of the token, or None if the token is ignored.
+        """
+        if self.is_permissible(word):
+            stem = self.stem(word)
+            if word in self.words_said:
+                code = EXACT_REPETITION
+            elif stem in self.stems_said:
+                code = STEM_REPETITION
+            else:
+                code = PERMISSIBLE_WORD
+            self.words_said.add(word)
+            self.stems_said.add(stem)
+        else:
+            lowered = word.lower()
+            if lowered.startswith('e_'):
+                code = EXAMINER_WORD
+            elif word.endswith('-'):
+                code = WORD_FRAGMENT
+            elif lowered.startswith('filledpause'):
+                code = FILLED_PAUSE
+            elif lowered not in IGNORED_TOKENS:
+                code = ASIDE
+            else:
+                return None
+        self.words.append(word)
+        self.codes.append(code)
+        return code
+
+    def classify_all(self, words):
+        """Labels a sequence of tokens, in order."""
+        for word in words:
+            self.classify(word)
+
+    def labels(self):
+        """Returns the label of every token that was not ignored, in order."""
+        return [LABELS[code] for code in self.codes]
+
+    def counts(self):
+        """Returns an array with the number of tokens having each label code."""
+        return np.bincount(np.array(self.codes, dtype=np.intp), minlength=len(LABELS))
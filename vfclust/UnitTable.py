@@ -0,0 +1,217 @@
+"""
+Columnar storage of the Units of a response.
+
+A response is stored as a UnitTable: one typed array per property of the Units, with every string
+(word, original word, phone or phonetic representation) interned once in a pool shared by all
+of them and stored as an integer id.  The words a Unit was made from, and the phones aligned to
+it, are runs of ids in shared arrays, given by an offset and a length.  Unit objects are only
+small views of a row of the table, so a response of n Units holds a few arrays of n numbers
+rather than n objects with their own dicts, strings and lists, and the later stages can read
+whole columns at once.
+"""
+from array import array
+
+import numpy as np
+
+__docformat__ = "restructuredtext en"
+
+#id of a missing string, e.g. a Unit without a phonetic representation
+NO_STRING = -1
+
+#length of a missing run of ids, e.g. the phones of a Unit from a csv file
+NO_RUN = -1
+
+
+class StringPool(object):
+    """ Class interning strings as consecutive integer ids."""
+
+    def __init__(self):
+        """Initializes an empty StringPool."""
+        self.strings = []
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def intern(self, string):
+        """Returns the id of a string, adding it if necessary.  None has the id NO_STRING."""
+        if string is None:
+            return NO_STRING
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def string(self, string_id):
+        """Returns the string with the given id, or None for NO_STRING."""
+        if string_id == NO_STRING:
+            return None
+        return self.strings[string_id]
+
+
+def to_time(value):
+    """Returns a time as stored in a time column, where None is nan."""
+    return np.nan if value is None else value
+
+
+def from_time(value):
+    """Returns a time read from a time column, where nan is None."""
+    return None if value != value else value
+
+
+class UnitTable(object):
+    """ Class holding the properties of a sequence of Units in columns.
+
+    Row i of the table is Unit i, stored as:
+        - text_ids[i]: id of the text of the Unit
+        - original_offsets[i], original_lengths[i]: run of original_ids holding the ids of
+            the words the Unit was made from
+        - start_times[i], end_times[i], durations[i]: timing of the Unit, nan if unknown
+        - phone_offsets[i], phone_lengths[i]: run of phone_ids holding the ids of the phones
+            aligned to the Unit; the length is NO_RUN if it has none (e.g. csv input)
+        - phonetic_ids[i]: id of the phonetic representation of the Unit, or NO_STRING
+        - timed_indices[i]: index of the Unit in the raw timed response, or -1
+    """
+
+    def __init__(self, format, type, pool=None):
+        """Initializes an empty UnitTable.
+
+        :param str format: 'TextGrid' or 'csv'
+        :param str type: 'SEMANTIC' or 'PHONETIC'
+        :param StringPool pool: (optional) pool of interned strings, shared with other tables.
+        """
+        self.format = format
+        self.type = type
+        self.pool = pool if pool is not None else StringPool()
+        self.text_ids = array('i')
+        self.original_offsets = array('i')
+        self.original_lengths = array('i')
+        self.original_ids = array('i')
+        self.start_times = array('d')
+        self.end_times = array('d')
+        self.durations = array('d')
+        self.phone_offsets = array('i')
+        self.phone_lengths = array('i')
+        self.phone_ids = array('i')
+        self.phonetic_ids = array('i')
+        self.timed_indices = array('i')
+
+    def __len__(self):
+        return len(self.text_ids)
+
+    def append(self, text, original_text=None, start_time=None, end_time=None, duration=None,
+               phones=None, phonetic_representation=None, index_in_timed_response=None):
+        """Adds a Unit to the end of the table.
+
+        :param str text: text of the Unit.
+        :param list original_text: (optional) words the Unit was made from. Defaults to [text].
+        :returns: the row of the new Unit.
+        """
+        if original_text is None:
+            original_text = [text]
+        self.text_ids.append(self.pool.intern(text))
+        self.original_offsets.append(len(self.original_ids))
+        self.original_lengths.append(len(original_text))
+        self.original_ids.extend(self.pool.intern(word) for word in original_text)
+        self.start_times.append(to_time(start_time))
+        self.end_times.append(to_time(end_time))
+        self.durations.append(to_time(duration))
+        self.phone_offsets.append(len(self.phone_ids))
+        if phones is None:
+            self.phone_lengths.append(NO_RUN)
+        else:
+            self.phone_lengths.append(len(phones))
+            self.phone_ids.extend(self.pool.intern(phone) for phone in phones)
+        self.phonetic_ids.append(self.pool.intern(phonetic_representation))
+        self.timed_indices.append(-1 if index_in_timed_response is None else index_in_timed_response)
+        return len(self.text_ids) - 1
+
+    def text(self, row):
+        """Returns the text of a Unit."""
+        return self.pool.strings[self.text_ids[row]]
+
+    def set_text(self, row, text):
+        """Sets the text of a Unit."""
+        self.text_ids[row] = self.pool.intern(text)
+
+    def original_text(self, row):
+        """Returns the list of words a Unit was made from."""
+        offset = self.original_offsets[row]
+        return [self.pool.strings[i] for i in self.original_ids[offset:offset + self.original_lengths[row]]]
+
+    def set_original_text(self, row, original_text):
+        """Sets the list of words a Unit was made from.  The previous run of ids is left unused."""
+        self.original_offsets[row] = len(self.original_ids)
+        self.original_lengths[row] = len(original_text)
+        self.original_ids.extend(self.pool.intern(word) for word in original_text)
+
+    def phones(self, row):
+        """Returns the list of phones aligned to a Unit, or None if it has none."""
+        length = self.phone_lengths[row]
+        if length == NO_RUN:
+            return None
+        offset = self.phone_offsets[row]
+        return [self.pool.strings[i] for i in self.phone_ids[offset:offset + length]]
+
+    def phonetic_representation(self, row):
+        """Returns the phonetic representation of a Unit, or None if it has none."""
+        return self.pool.string(self.phonetic_ids[row])
+
+    def set_phonetic_representation(self, row, phonetic_representation):
+        """Sets the phonetic representation of a Unit."""
+        self.phonetic_ids[row] = self.pool.intern(phonetic_representation)
+
+    def texts(self):
+        """Returns the text of every Unit, in order."""
+        strings = self.pool.strings
+        return [strings[i] for i in self.text_ids]
+
+    def phonetic_representations(self):
+        """Returns the phonetic representation of every Unit (None if it has none), in order."""
+        return [self.pool.string(i) for i in self.phonetic_ids]
+
+    def column(self, name):
+        """Returns a copy of a column of the table as a numpy array, e.g. column('start_times')."""
+        values = getattr(self, name)
+        dtype = np.float64 if values.typecode == 'd' else np.dtype('i%d' % values.itemsize)
+        if not values:
+            return np.zeros(0, dtype=dtype)
+        # copied, as the array may be reallocated when Units are added
+        return np.frombuffer(values, dtype=dtype).copy()
+
+    def merge(self, groups, join_texts=False):
+        """Returns a new table with one Unit per group of rows of this one, sharing its pool.
+
+        :param groups: sequence of non-empty lists of rows, in order.  Each group becomes a Unit
+            with the properties of its first row, except that the text of every other row is
+            added to its original text, and its end time is that of its last row.  A group of
+            one row is a copy of that row, and rows in no group are left out.
+        :param bool join_texts: If True, the text of each new Unit is the texts of its group
+            joined by underscores, as for compound words (e.g. polar_bear).
+        :rtype : UnitTable
+        """
+        table = UnitTable(self.format, self.type, self.pool)
+        for group in groups:
+            first, last = group[0], group[-1]
+            offset = self.original_offsets[first]
+            if join_texts and len(group) > 1:
+                table.text_ids.append(self.pool.intern("_".join(self.text(row) for row in group)))
+            else:
+                table.text_ids.append(self.text_ids[first])
+            table.original_offsets.append(len(table.original_ids))
+            table.original_ids.extend(self.original_ids[offset:offset + self.original_lengths[first]])
+            table.original_ids.extend(self.text_ids[row] for row in group[1:])
+            table.original_lengths.append(len(table.original_ids) - table.original_offsets[-1])
+            table.start_times.append(self.start_times[first])
+            table.end_times.append(self.end_times[last])
+            table.durations.append(self.durations[first])
+            length = self.phone_lengths[first]
+            table.phone_offsets.append(len(table.phone_ids))
+            table.phone_lengths.append(length)
+            if length > 0:
+                offset = self.phone_offsets[first]
+                table.phone_ids.extend(self.phone_ids[offset:offset + length])
+            table.phonetic_ids.append(self.phonetic_ids[first])
+            table.timed_indices.append(self.timed_indices[first])
+        return table
@@ -0,0 +1,194 @@
+"""
+Memoized stems and lemmas of response words.
+
+VFClust stems words with the NLTK Porter stemmer (to find same-stem repetitions) and lemmatizes
+them with the NLTK WordNet lemmatizer (to map inflected animal names to their term vectors).
+Both are called over and over on the same few thousand words, and the lemmatizer has to load
+WordNet before it can be used at all.  A WordForms object answers these calls from:
+    1. precomputed tables of the stems and lemmas of a whole vocabulary (the English Open Word
+        List, or the permissible words of a category), built once, offline
+    2. a bounded least-recently-used cache of the words it has seen that are not in a table
+    3. the NLTK stemmer and lemmatizer themselves, created (and WordNet loaded) only when a word
+        is in neither
+
+To build the tables, run:
+
+    python WordForms.py
+
+from the vfclust/ directory (or "make word_forms").  The tables hold the output of the NLTK
+version installed when they are built.
+"""
+import os
+import sys
+import cPickle as pickle
+from collections import OrderedDict
+
+__docformat__ = "restructuredtext en"
+
+data_path = os.path.join(os.path.dirname(__file__), 'data/')
+
+#default number of words kept in each cache
+DEFAULT_CACHE_SIZE = 50000
+
+#WordForms objects already loaded in this process, by vocabularies
+_word_forms = {}
+
+
+def get_table_path(vocabulary, directory=data_path):
+    """Returns the path of the table of stems and lemmas of a vocabulary, e.g. 'EOWL' or 'animals'."""
+    return os.path.join(directory, vocabulary + '_word_forms.dat')
+
+
+class LRUCache(object):
+    """ Class holding a dictionary of at most max_size entries, which forgets the least recently used."""
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        """Initializes an empty LRUCache.
+
+        :param int max_size: largest number of entries kept.
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        """Returns the value of a key, marking it as the most recently used, or default if it is missing."""
+        try:
+            value = self.entries.pop(key)
+        except KeyError:
+            return default
+        self.entries[key] = value
+        return value
+
+    def put(self, key, value):
+        """Adds an entry, forgetting the least recently used one if the cache is full."""
+        self.entries.pop(key, None)
+        self.entries[key] = value
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+class WordForms(object):
+    """ Class answering stem and lemma queries from precomputed tables, a cache, and NLTK."""
+
+    def __init__(self, tables=None, cache_size=DEFAULT_CACHE_SIZE):
+        """Initializes a WordForms object.
+
+        :param list tables: (optional) tables of stems and lemmas, as returned by build_table().
+        :param int cache_size: largest number of words kept in each of the stem and lemma caches.
+        """
+        # words of the tables, and their stems and lemmas where they differ from the word
+        self.table_words = set()
+        self.table_stems = {}
+        self.table_lemmas = {}
+        for table in tables or []:
+            self.add_table(table)
+        self.stem_cache = LRUCache(cache_size)
+        self.lemma_cache = LRUCache(cache_size)
+        self.stemmer = None
+        self.lemmatizer = None
+
+    @classmethod
+    def load(cls, vocabularies, directory=data_path, cache_size=DEFAULT_CACHE_SIZE):
+        """Returns a WordForms object with the tables of the given vocabularies that have been built.
+
+        :param list vocabularies: names of vocabularies, e.g. ['EOWL', 'animals']
+        :param str directory: directory holding the tables, by default the supporting data directory.
+        :param int cache_size: largest number of words kept in each of the stem and lemma caches.
+        :rtype : WordForms
+        """
+        tables = []
+        for vocabulary in vocabularies:
+            path = get_table_path(vocabulary, directory)
+            if os.path.isfile(path):
+                with open(path, 'rb') as infile:
+                    tables.append(pickle.load(infile))
+        return cls(tables, cache_size=cache_size)
+
+    def add_table(self, table):
+        """Adds a table of stems and lemmas, as returned by build_table()."""
+        self.table_words.update(table['words'])
+        self.table_stems.update(table['stems'])
+        self.table_lemmas.update(table['lemmas'])
+
+    def stem(self, word):
+        """Returns the Porter stem of a word."""
+        if word in self.table_words:
+            return self.table_stems.get(word, word)
+        stem = self.stem_cache.get(word)
+        if stem is None:
+            if self.stemmer is None:
+                from nltk import PorterStemmer
+                self.stemmer = PorterStemmer()
+            stem = self.stemmer.stem(word)
+            self.stem_cache.put(word, stem)
+        return stem
+
+    def lemmatize(self, word):
+        """Returns the WordNet (noun) lemma of a word."""
+        if word in self.table_words:
+            return self.table_lemmas.get(word, word)
+        lemma = self.lemma_cache.get(word)
+        if lemma is None:
+            if self.lemmatizer is None:
+                from nltk.stem.wordnet import WordNetLemmatizer
+                self.lemmatizer = WordNetLemmatizer()
+            lemma = self.lemmatizer.lemmatize(word)
+            self.lemma_cache.put(word, lemma)
+        return lemma
+
+
+def get_word_forms(vocabularies=()):
+    """Returns the WordForms object with the tables of the given vocabularies, loading it only the
+    first time in a process, so that its caches are shared by every response analyzed.
+
+    :param list vocabularies: names of vocabularies, e.g. ['EOWL']
+    """
+    key = tuple(vocabularies)
+    if key not in _word_forms:
+        _word_forms[key] = WordForms.load(key)
+    return _word_forms[key]
+
+
+def build_table(words, word_forms=None):
+    """Returns a table of the stems and lemmas of a list of words.
+
+    :param list words: vocabulary of the table.
+    :param WordForms word_forms: (optional) object used to compute the stems and lemmas.
+    :returns: dict with the 'words' of the table, and dicts of the 'stems' and 'lemmas' that
+        differ from their word.
+    """
+    if word_forms is None:
+        word_forms = WordForms(cache_size=0)
+    words = sorted(set(words))
+    table = {'words': words, 'stems': {}, 'lemmas': {}}
+    for word in words:
+        stem = word_forms.stem(word)
+        if stem != word:
+            table['stems'][word] = stem
+        lemma = word_forms.lemmatize(word)
+        if lemma != word:
+            table['lemmas'][word] = lemma
+    return table
+
+
+def main(directory=data_path):
+    """Builds the tables of the English Open Word List and the animal names, and saves them."""
+    import nltk
+    nltk.data.path.append(os.path.join(directory, 'nltk_data/'))
+
+    vocabularies = {'EOWL': open(os.path.join(directory, 'EOWL', 'english_words.txt'), 'r').read().split()}
+    with open(os.path.join(directory, 'animals_names.dat'), 'rb') as infile:
+        vocabularies['animals'] = pickle.load(infile)
+
+    for vocabulary in sorted(vocabularies):
+        table = build_table(vocabularies[vocabulary])
+        with open(get_table_path(vocabulary, directory), 'wb') as outfile:
+            pickle.dump(table, outfile, pickle.HIGHEST_PROTOCOL)
+        print "Saved the stems and lemmas of", len(table['words']), "words to", get_table_path(vocabulary, directory)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -7,23 +7,37 @@ python vfclust.py --similarity-file data/similarity/similarity_rand.txt --thresh
 python vfclust.py --threshold .99 -p s example/EXAMPLE.TextGrid
  """
 from __future__ import division  # makes / do floating point division
-import os, re, subprocess, csv, argparse, sys
+import os, re, csv, argparse, sys, glob, itertools
+import multiprocessing
+import multiprocessing.util
 import cPickle as pickle  # faster for the LSA part
+import numpy as np
 from collections import defaultdict
-from tempfile import NamedTemporaryFile
-from math import sqrt
 from TextGridParser import TextGrid
+from TextGridCache import TextGridCache
+from Lexicon import Lexicon
+from LSASpace import LSASpace, LSAStack, LSA_DIMENSIONALITIES
+from SimilarityMatrix import SimilarityMatrix
+from CollectionEngine import find_chains, find_clusters, sweep_collections
+from PhoneTable import PhoneTable, collection_timing
+import EditDistance
+import LetterToPhoneme
+from T2PPool import T2PPool
+from PronunciationTable import PronunciationTable, compact_phonetic_representation, CMU_PHONES
+from WordForms import get_word_forms
+from UnitTable import UnitTable, to_time, from_time
+from TokenClassifier import TokenClassifier, PERMISSIBLE_WORD, EXACT_REPETITION, STEM_REPETITION, \
+    EXAMINER_WORD, WORD_FRAGMENT, FILLED_PAUSE, ASIDE
 
-from nltk.stem.wordnet import WordNetLemmatizer
-from nltk import PorterStemmer
 import nltk
-lemmatizer = WordNetLemmatizer()
-stemmer = PorterStemmer()
 
 data_path = os.path.join(os.path.dirname(__file__), 'data/')
 nltk.data.path.append(os.path.join(data_path,'nltk_data/'))
 __docformat__ = "restructuredtext en"
 
+#labels of aligned phones that are not speech, skipped when building pronunciations from phones
+NON_SPEECH_PHONES = ['SIL', '!SIL', 'SP', '']
+
 def print_table(table):
     """Helper function for printing tables to screen.
 
@@ -58,7 +72,7 @@ class Args():
 
 
 # holds sequence of adjacent words with the same stem
-class Unit():
+class Unit(object):
     """ Class to hold a sequence of 1 or more adjacent words with the same stem, or a compound word.
 
     A Unit may represent:
@@ -68,9 +82,16 @@ class Unit():
      The object also includes:
         - phonetic/semantic representation of the FIRST word, if more than one
         - The start time of the first word and the ending time of the final word
+        - The phones aligned to the FIRST word, if the response is a TextGrid
+
+    A Unit is a view of one row of a UnitTable, where the Units of a ParsedResponse are stored
+    in columns.  Setting its properties modifies the table; the lists returned by .original_text
+    and .phones are copies.
     """
+    __slots__ = ('table', 'row')
+
     def __init__(self, word, format, type, index_in_timed_response = None):
-        """Initialization of Unit object.
+        """Initialization of Unit object, in a table of its own.
 
         :param word:        Original word that the Unit represents.
         :type word:         If format is "TextGrid", this must be a TextGrid.Word object.
@@ -81,29 +102,103 @@ class Unit():
                 Used to find phone-level information later if necessary.
         :rtype : Unit object
         """
-        self.type = type
-        self.format = format
-        self.phonetic_representation = None
-        self.index_in_timed_response = index_in_timed_response
-
-        if self.format == "TextGrid":
-            self.text = word.string.lower()
-            self.original_text = [word.string.lower()] # list b/c there might be more than one in the future
-            self.start_time = word.start
-            self.end_time = word.end
-            self.duration = word.duration
-        elif self.format == "csv":
-            self.text = word.lower()
-            self.original_text = [word.lower()] # list b/c there might be more than one in the future
-            self.start_time = None
-            self.end_time = None
-            self.duration = None
+        self.table = UnitTable(format, type)
+        self.row = append_unit(self.table, word, index_in_timed_response)
+
+    @classmethod
+    def view(cls, table, row):
+        """Returns the Unit in a row of a UnitTable."""
+        unit = cls.__new__(cls)
+        unit.table = table
+        unit.row = row
+        return unit
+
+    @property
+    def type(self):
+        return self.table.type
+
+    @property
+    def format(self):
+        return self.table.format
+
+    @property
+    def text(self):
+        return self.table.text(self.row)
+
+    @text.setter
+    def text(self, text):
+        self.table.set_text(self.row, text)
+
+    @property
+    def original_text(self):
+        return self.table.original_text(self.row)
+
+    @original_text.setter
+    def original_text(self, original_text):
+        self.table.set_original_text(self.row, original_text)
+
+    @property
+    def start_time(self):
+        return from_time(self.table.start_times[self.row])
+
+    @start_time.setter
+    def start_time(self, start_time):
+        self.table.start_times[self.row] = to_time(start_time)
+
+    @property
+    def end_time(self):
+        return from_time(self.table.end_times[self.row])
+
+    @end_time.setter
+    def end_time(self, end_time):
+        self.table.end_times[self.row] = to_time(end_time)
+
+    @property
+    def duration(self):
+        return from_time(self.table.durations[self.row])
+
+    @property
+    def phones(self):
+        return self.table.phones(self.row)
+
+    @property
+    def phonetic_representation(self):
+        return self.table.phonetic_representation(self.row)
+
+    @phonetic_representation.setter
+    def phonetic_representation(self, phonetic_representation):
+        self.table.set_phonetic_representation(self.row, phonetic_representation)
+
+    @property
+    def index_in_timed_response(self):
+        index = self.table.timed_indices[self.row]
+        return None if index < 0 else index
 
     def __str__(self):
         """ Enables the str() function. Returns the simplest textual representation of the Unit."""
         return self.text
 
 
+def append_unit(table, word, index_in_timed_response = None):
+    """Adds a Unit for a word of the raw response to a UnitTable.
+
+    :param UnitTable table: table of the format of the word.
+    :param word: a TextGrid.Word if the format of the table is "TextGrid", or a string if it is "csv".
+    :param int index_in_timed_response: Index in the raw response input.
+    :returns: the row of the new Unit.
+    """
+    if table.format == "TextGrid":
+        return table.append(word.string.lower(),
+                            start_time = word.start,
+                            end_time = word.end,
+                            duration = word.duration,
+                            phones = [phone.string for phone in word.phones],
+                            index_in_timed_response = index_in_timed_response)
+    elif table.format == "csv":
+        return table.append(word.lower(), index_in_timed_response = index_in_timed_response)
+    raise VFClustException("Unknown response format: " + str(table.format))
+
+
 class ParsedResponse():
     """ Implements a representation of a subject response, along with methods for parsing it.
 
@@ -111,6 +206,9 @@ class ParsedResponse():
     relevant to type of clustering being performed by VFClust. It implements methods for
     simplifying the list of Units, removing repetitions, creating compound words, removing
     irrelevant response tokens, etc.
+
+    The Units are stored in columns, in a UnitTable (self.units), and are created as views of
+    its rows when accessed.
          """
     def __init__(self,response_type,
                  letter_or_category,
@@ -119,7 +217,11 @@ class ParsedResponse():
                  english_words = None, # big list of legal words
                  lemmas = None, # list of available lemmas
                  names = None, # list of tokenized responses, i.e. tokenized animal names
-                 permissible_words = None): # list of semantic words (animals, etc)
+                 permissible_words = None, # list of semantic words (animals, etc)
+                 lexicon = None, # hash-indexed views of the three lists above
+                 phonetic_transcriber = None, # generates pronunciations of words missing from cmudict
+                 use_aligned_phones = False, # use the phones of TextGrid responses as pronunciations
+                 word_forms = None): # memoized stems and lemmas of words
 
         """Initializes a ParsedResponse object.
 
@@ -129,23 +231,43 @@ class ParsedResponse():
                             required for determining which Units in the list are appropriate responses
                             to the current fluencyt ask
         :param bool quiet:  If True, suppresses output to screen.
-        :param dict cmudict: Dictionary of phonetic representations of words. Used for phonetic clustering.
+        :param dict cmudict: Dictionary (or PronunciationTable) of phonetic representations of words. Used for phonetic clustering.
         :param list english_words: Big list of English words. Used to determine whether responses
                             in the phonetic clustering response are in English.
         :param set lemmas:  Set of available lemmas, i.e. words in their simplest version (non-plural)
         :param list names:  List of tokenized responses, i.e. compound words.
         :param list permissible_words:  List of legal words of the relevant dimension
+        :param Lexicon lexicon: Hash-indexed views of english_words, names and permissible_words.
+                            If not given, one is built from those lists.
+        :param phonetic_transcriber: Object whose transcribe_words() method returns CMUdict-formatted
+                            pronunciations for a list of words, used for words missing from cmudict.
+                            Defaults to the in-process t2p decision tree (LetterToPhoneme.DecisionTree).
+        :param bool use_aligned_phones: If True, the phonetic representation of a Unit from a TextGrid
+                            is built from the phones aligned to it, i.e. the pronunciation actually spoken,
+                            rather than looked up in cmudict or generated.
+        :param WordForms word_forms: Source of the stems and lemmas of words. Defaults to the WordForms
+                            shared by the process, without precomputed tables.
         """
         self.type = response_type
         self.letter_or_category = letter_or_category
         self.quiet = quiet
         self.cmudict = cmudict
-        self.english_words = english_words
+        if lexicon is None:
+            lexicon = Lexicon(english_words = english_words,
+                              permissible_words = permissible_words,
+                              names = names)
+        self.lexicon = lexicon
+        self.english_words = lexicon.english_words
         self.lemmas = lemmas
-        self.names = names
-        self.permissible_words = permissible_words
-
-        self.unit_list = []
+        self.names = lexicon.names
+        self.permissible_words = lexicon.permissible_words
+        self.phonetic_transcriber = phonetic_transcriber
+        self.use_aligned_phones = use_aligned_phones
+        if word_forms is None:
+            word_forms = get_word_forms()
+        self.word_forms = word_forms
+
+        self.units = UnitTable(None, self.type)
         self.timing_included = None
 
         self.iterator_index = 0 # used for iterating
@@ -154,7 +276,8 @@ class ParsedResponse():
         """
         Makes the object iterable, iterates over the list of units in the ParsedResponse.
         """
-        return iter(self.unit_list)
+        units = self.units
+        return (Unit.view(units, row) for row in xrange(len(units)))
 
 
     def __len__(self):
@@ -162,11 +285,31 @@ class ParsedResponse():
         Implements len(), returns length of the list of units in the ParsedResponse.
 
         """
-        return len(self.unit_list)
+        return len(self.units)
 
     def __getitem__(self,i):
-        """ Implements e.g. parsed_response[i] to return the ith Unit in the ParsedResponse. """
-        return self.unit_list[i]
+        """ Implements e.g. parsed_response[i] to return the ith Unit in the ParsedResponse,
+        or parsed_response[start:end] to return a list of Units. """
+        if isinstance(i, slice):
+            return [Unit.view(self.units, row) for row in xrange(*i.indices(len(self.units)))]
+        if i < 0:
+            i += len(self.units)
+        if not 0 <= i < len(self.units):
+            raise IndexError("ParsedResponse index out of range")
+        return Unit.view(self.units, i)
+
+    @property
+    def unit_list(self):
+        """List of the Units in the ParsedResponse."""
+        return self[:]
+
+    def texts(self):
+        """Returns the text of every Unit, in order."""
+        return self.units.texts()
+
+    def phonetic_representations(self):
+        """Returns the phonetic representation of every Unit, in order."""
+        return self.units.phonetic_representations()
 
     def create_from_csv(self,token_list):
         """ Fills the ParsedResponse object with a list of words/tokens originally from a .csv file.
@@ -175,13 +318,14 @@ class ParsedResponse():
 
         Modifies:
             - self.timing_included: csv files do not include timing information
-            - self.unit_list: fills it with Unit objects derived from the token_list argument.
+            - self.units: fills it with Unit objects derived from the token_list argument.
                 If the type is 'SEMANTIC', the words in these units are automatically lemmatized and
                 made into compound words where appropriate.
         """
         self.timing_included = False
+        self.units.format = "csv"
         for entry in token_list:
-            self.unit_list.append(Unit(entry, format = "csv", type = self.type))
+            append_unit(self.units, entry)
 
         # combine compound words, remove pluralizations, etc
         if self.type == "SEMANTIC":
@@ -195,15 +339,14 @@ class ParsedResponse():
 
         Modifies:
             - self.timing_included: TextGrid files include timing information
-            - self.unit_list: fills it with Unit objects derived from the word_list argument.
+            - self.units: fills it with Unit objects derived from the word_list argument.
                 If the type is 'SEMANTIC', the words in these units are automatically lemmatized and
                 made into compound words where appropriate.
         """
         self.timing_included = True
+        self.units.format = "TextGrid"
         for i, entry in enumerate(word_list):
-            self.unit_list.append(Unit(entry, format="TextGrid",
-                                       type=self.type,
-                                       index_in_timed_response=i))
+            append_unit(self.units, entry, index_in_timed_response=i)
 
         # combine compound words, remove pluralizations, etc
         if self.type == "SEMANTIC":
@@ -211,10 +354,10 @@ class ParsedResponse():
             self.tokenize()
 
     def lemmatize(self):
-        """Lemmatize all Units in self.unit_list.
+        """Lemmatize all Units in self.units.
 
         Modifies:
-            - self.unit_list: converts the .text property into its lemmatized form.
+            - self.units: converts the .text property into its lemmatized form.
 
         This method lemmatizes all inflected variants of permissible words to
         those words' respective canonical forms. This is done to ensure that
@@ -224,16 +367,17 @@ class ParsedResponse():
         similarly lemmatized, meaning that , e.g., 'dogs' will not have a term
         vector to use for semantic relatedness computation.)
         """
-        for unit in self.unit_list:
-            if lemmatizer.lemmatize(unit.text) in self.lemmas:
-                    unit.text = lemmatizer.lemmatize(unit.text)
+        for row, text in enumerate(self.units.texts()):
+            lemma = self.word_forms.lemmatize(text)
+            if lemma in self.lemmas:
+                self.units.set_text(row, lemma)
 
 
     def tokenize(self):
         """Tokenizes all multiword names in the list of Units.
 
         Modifies:
-            - (indirectly) self.unit_list, by combining words into compound words.
+            - (indirectly) self.units, by combining words into compound words.
 
         This is done because many names may be composed of multiple words, e.g.,
         'grizzly bear'. In order to count the number of permissible words
@@ -245,114 +389,29 @@ class ParsedResponse():
             print
             print "Finding compound words..."
 
-        # lists of animal names containing 2-5 separate words
-        compound_word_dict = {}
-        for compound_length in range(5,1,-1):
-            compound_word_dict[compound_length] = [name for name in self.names if len(name.split()) == compound_length]
-
+        # longest-match compounding in a single left-to-right pass over the Units
+        words = self.units.texts()
+        groups = []
         current_index = 0
-        finished = False
-        while not finished:
-            for compound_length in range(5,1,-1): #[5, 4, 3, 2]
-                if current_index + compound_length - 1 < len(self.unit_list): #don't want to overstep bounds of the list
-                    compound_word = ""
-                    #create compound word
-                    for word in self.unit_list[current_index:current_index + compound_length]:
-                        compound_word += " " + word.text
-                    compound_word = compound_word.strip() # remove initial white space
-                    #check if compound word is in list
-                    if compound_word in compound_word_dict[compound_length]:
-                        #if so, create the compound word
-                        self.make_compound_word(start_index = current_index, how_many = compound_length)
-                        current_index += 1
-                        break
-            else: #if no breaks for any number of words
+        while current_index < len(words):
+            compound_length = self.lexicon.match_compound_name(words, current_index)
+            if compound_length > 1:
+                if not self.quiet:
+                    compound_word = " ".join(words[current_index:current_index + compound_length])
+                    print compound_word, "-->", "_".join(compound_word.split())
+                groups.append(range(current_index, current_index + compound_length))
+                current_index += compound_length
+            else:
+                groups.append([current_index])
                 current_index += 1
-                if current_index >= len(self.unit_list): # check here instead of at the top in case
-                                                         # changing the unit list length introduces a bug
-                    finished = True
-
-    def make_compound_word(self, start_index, how_many):
-        """Combines two Units in self.unit_list to make a compound word token.
-
-        :param int start_index: Index of first Unit in self.unit_list to be combined
-        :param int how_many: Index of how many Units in self.unit_list to be combined.
-
-        Modifies:
-                - self.unit_list: Modifies the Unit corresponding to the first word
-                    in the compound word. Changes the .text property to include .text
-                    properties from subsequent Units, separted by underscores. Modifies
-                    the .original_text property to record each componentword separately.
-                    Modifies the .end_time property to be the .end_time of the final unit
-                    in the compound word.  Finally, after extracting the text and timing
-                    information, it removes all units in the compound word except for the
-                    first.
-
-        .. note: This method is only used with semantic processing, so we don't need to worry
-            about the phonetic representation of Units.
-
-        """
-        if not self.quiet:
-            compound_word = ""
-            for word in self.unit_list[start_index:start_index + how_many]:
-                compound_word += " " + word.text
-            print compound_word.strip(), "-->","_".join(compound_word.split())
-
-        #combine text
-        for other_unit in range(1, how_many):
-            self.unit_list[start_index].original_text.append(self.unit_list[start_index + other_unit].text)
-            self.unit_list[start_index].text += "_" + self.unit_list[start_index + other_unit].text
-
-        #start time is the same. End time is the end time of the LAST word
-        self.unit_list[start_index].end_time = self.unit_list[start_index + how_many - 1].end_time
-
-        #shorten unit_list
-        self.unit_list = self.unit_list[:start_index + 1] + self.unit_list[start_index + how_many:]
-
-    def remove_unit(self, index):
-        '''Removes the unit at the given index in self.unit_list. Does not modify any other units.'''
-        if not self.quiet:
-            print "Removing", self.unit_list[index].text
-        self.unit_list.pop(index)
-
-    def combine_same_stem_units(self, index):
-        """Combines adjacent words with the same stem into a single unit.
-
-        :param int index: Index of Unit in self.unit_list to be combined with the
-            subsequent Unit.
-
-        Modifies:
-                - self.unit_list: Modifies the .original_text property of the Unit
-                    corresponding to the index.  Changes the .end_time property to be the
-                    .end_time of the next Unit, as Units with the same stem are considered
-                     as single Unit inc lustering. Finally, after extracting the text and timing
-                    information, it removes the unit at index+1.
-
-        """
-
-        if not self.quiet:
-            combined_word = ""
-            for word in self.unit_list[index:index + 2]:
-                for original_word in word.original_text:
-                    combined_word += " " + original_word
-            print combined_word.strip(), "-->","/".join(combined_word.split())
-
-        # edit word list to reflect what words are represented by this unit
-        self.unit_list[index].original_text.append(self.unit_list[index + 1].text)
-
-        #start time is the same. End time is the end time of the LAST word
-        self.unit_list[index].end_time = self.unit_list[index + 1].end_time
-
-        # remove word with duplicate stem
-        self.unit_list.pop(index + 1)
-
+        self.units = self.units.merge(groups, join_texts = True)
 
     def display(self):
         """Pretty-prints the ParsedResponse to the screen."""
 
         table_list = []
         table_list.append(("Text","Orig. Text","Start time","End time", "Phonetic"))
-        for unit in self.unit_list:
+        for unit in self:
             table_list.append((unit.text,
                                "/".join(unit.original_text),
                                unit.start_time,
@@ -374,22 +433,22 @@ class ParsedResponse():
         modify_phonetic_representation().
 
         """
-        with NamedTemporaryFile() as temp_file:
-            # Write the word to a temp file
-            temp_file.write(word)
-            #todo - clean up this messy t2p path
-            t2pargs = [os.path.abspath(os.path.join(os.path.dirname(__file__),'t2p/t2p')),
-                       '-transcribe', os.path.join(data_path, 'cmudict.0.7a.tree'),
-                       temp_file.name]
-            temp_file.seek(0)
-            output, error = subprocess.Popen(
-                t2pargs, stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            ).communicate()
-            output = output.split()
-            phonetic_representation = output[1:]
-
-        return phonetic_representation
+        return self.generate_phonetic_representations([word])[0]
+
+    def generate_phonetic_representations(self, words):
+        """
+        Returns generated phonetic representations for a list of words.
+
+        :param list words: words to be phoneticized.
+        :return: A list with one list of phonemes per word.
+
+        Pronunciations are generated by the t2p decision tree (data/cmudict.0.7a.tree),
+        evaluated in-process, so that all of the words in a response are phoneticized
+        without starting any processes or reloading the tree.
+        """
+        if self.phonetic_transcriber is None:
+            self.phonetic_transcriber = LetterToPhoneme.get_decision_tree()
+        return self.phonetic_transcriber.transcribe_words(words)
 
     def modify_phonetic_representation(self, phonetic_representation):
         """ Returns a compact phonetic representation given a CMUdict-formatted representation.
@@ -402,36 +461,42 @@ class ParsedResponse():
         Changing the phonetic representation from a list to a string is useful for calculating phonetic
         simlarity scores.
         """
+        return compact_phonetic_representation(phonetic_representation)
 
-        for i in range(len(phonetic_representation)):
-            # Remove numerical stress indicators
-            phonetic_representation[i] = re.sub('\d+', '', phonetic_representation[i])
-
-        multis = ['AA', 'AE', 'AH', 'AO', 'AW', 'AY', 'CH', 'DH', 'EH', 'ER',
-                  'EY', 'HH', 'IH', 'IY', 'JH', 'NG', 'OW', 'OY', 'SH',
-                  'TH', 'UH', 'UW', 'ZH']
-
-        singles = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l',
-                   'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w']
+    def get_aligned_phonetic_representation(self, unit):
+        """ Returns a compact phonetic representation built from the phones aligned to a Unit.
 
-        for i in range(len(phonetic_representation)):
-            # Convert multicharacter phone symbols to arbitrary
-            # single-character symbols
-            if phonetic_representation[i] in multis:
-                phonetic_representation[i] = singles[multis.index(phonetic_representation[i])]
-        phonetic_representation = ''.join(phonetic_representation)
-
-        return phonetic_representation
-
-    def clean(self):
+        :param Unit unit: a Unit created from a TextGrid.Word
+        :returns: A compact phonetic representation (see modify_phonetic_representation()), or
+            None if aligned phones are not used, the Unit has no aligned speech phones, or any of
+            them is not in the CMU phone set (e.g. the aligner's SPN or <unk> labels), in which
+            case the dictionary pronunciation is used instead.
+        """
+        if not self.use_aligned_phones or not unit.phones:
+            return None
+        phones = [re.sub('\d+', '', phone.upper()) for phone in unit.phones
+                  if phone.upper() not in NON_SPEECH_PHONES]
+        # other labels would be kept as multi-character chunks, while the edit distance
+        # requires one character per phoneme
+        if not phones or not all(phone in CMU_PHONES for phone in phones):
+            return None
+        return self.modify_phonetic_representation(phones)
+
+    def clean(self, events=None):
         """ Removes any Units that are not applicable given the current semantic or phonetic category.
 
+        :param list events: (optional) If given, a tuple describing each step of the cleaning is
+            appended to it, in order:
+                - ("remove", text): a Unit was removed because it does not fit the category
+                - ("combine", text, next_text): the next Unit was combined with a Unit with the same stem
+                - ("phonetic", text, phonetic_representation): a Unit was given its phonetic representation
+
         Modifies:
-            - self.unit_list: Removes Units from this list that do not fit into the clustering category.
+            - self.units: Removes Units from this list that do not fit into the clustering category.
                 it does by by either combining units to make compound words, combining units with the
                 same stem, or eliminating units altogether if they do not conform to the category.
                  If the type is phonetic, this method also generates phonetic clusters for all Unit
-                 objects in self.unit_list.
+                 objects in self.units.
 
 
         This method performs three main tasks:
@@ -442,67 +507,370 @@ class ParsedResponse():
                 http://www.nltk.org/_modules/nltk/stem/porter.html
             3. In the case of PHONETIC clustering, compute the phonetic representation of each unit.
 
+        The first two are done in a single pass over the Units, in which each word is stemmed once.
         """
 
         if not self.quiet:
             print
             print "Preprocessing input..."
             print "Raw response:"
-            print self.display()
+            self.display()
 
         if not self.quiet:
             print
             print "Cleaning words..."
 
-        #weed out words not starting with the right letter or in the right category
-        current_index = 0
-        while current_index < len(self.unit_list):
-            word = self.unit_list[current_index].text
-            if self.type == "PHONETIC":
-                test = (word.startswith(self.letter_or_category) and  #starts with required letter
-                        not word.endswith('-') and  # Weed out word fragments
-                            '_' not in word and # Weed out, e.g., 'filledpause_um'
-                        word.lower() in self.english_words) #make sure the word is english
-            elif self.type == "SEMANTIC":
-                test = word in self.permissible_words
-            if not test: #if test fails remove word
-                self.remove_unit(index = current_index)
-            else: # otherwise just increment, but check to see if you're at the end of the list
-                current_index += 1
-
-        #combine words with the same stem
-        current_index = 0
-        finished = False
-        while current_index < len(self.unit_list) - 1:
-            #don't combine for lists of length 0, 1
-            if stemmer.stem(self.unit_list[current_index].text) == \
-                stemmer.stem(self.unit_list[current_index + 1].text):
-                #if same stem as next, merge next unit with current unit
-                self.combine_same_stem_units(index = current_index)
-            else: # if not same stem, increment index
-                current_index += 1
+        groups = []
+        previous_stem = None
+        units = self.units
+        for row, text in enumerate(units.texts()):
+            #weed out words not starting with the right letter or in the right category
+            if not self.is_in_category(text):
+                if not self.quiet:
+                    print "Removing", text
+                if events is not None:
+                    events.append(("remove", text))
+                continue
+
+            #combine words with the same stem as the previous word
+            stem = self.word_forms.stem(text)
+            if groups and stem == previous_stem:
+                group = groups[-1]
+                if not self.quiet:
+                    combined_word = " ".join(units.original_text(group[0]) +
+                                             [units.text(other) for other in group[1:]] +
+                                             units.original_text(row))
+                    print combined_word, "-->", "/".join(combined_word.split())
+                if events is not None:
+                    events.append(("combine", units.text(group[0]), text))
+                # the text of the word is added to the original text of the unit, and
+                # the end time of the unit becomes the end time of the word
+                group.append(row)
+            else:
+                groups.append([row])
+                previous_stem = stem
+        self.units = units.merge(groups)
 
         #get phonetic representations
         if self.type == "PHONETIC":
-            for unit in self.unit_list:
-                word = unit.text
-
-                #get phonetic representation
-                if word in self.cmudict:
+            units = self.units
+            missing_rows = []
+            for row, text in enumerate(units.texts()):
+                aligned_representation = self.get_aligned_phonetic_representation(Unit.view(units, row))
+                if aligned_representation is not None:
+                    # If the response is timed, use the phones that were actually spoken
+                    units.set_phonetic_representation(row, aligned_representation)
+                elif text in self.cmudict:
                     # If word in CMUdict, get its phonetic representation
-                    phonetic_representation = self.cmudict[word]
-                if word not in self.cmudict:
-                    # Else, generate a phonetic representation for it
-                    phonetic_representation = self.generate_phonetic_representation(word)
-                    phonetic_representation = self.modify_phonetic_representation(phonetic_representation)
+                    units.set_phonetic_representation(row, self.cmudict[text])
+                else:
+                    missing_rows.append(row)
 
-                unit.phonetic_representation = phonetic_representation
+            # words missing from CMUdict are phoneticized together
+            missing_words = list(set(units.text(row) for row in missing_rows))
+            generated = dict(zip(missing_words, self.generate_phonetic_representations(missing_words)))
+            for row in missing_rows:
+                units.set_phonetic_representation(row, self.modify_phonetic_representation(list(generated[units.text(row)])))
+
+            if events is not None:
+                for text, phonetic_representation in zip(units.texts(), units.phonetic_representations()):
+                    events.append(("phonetic", text, phonetic_representation))
 
         if not self.quiet:
             print
             print "Cleaned response:"
-            print self.display()
+            self.display()
+
+    def is_in_category(self, word):
+        """Returns True if a word fits the clustering category, i.e. is kept by clean().
+
+        :param str word: the text of a Unit.
+        """
+        if self.type == "PHONETIC":
+            return (word.startswith(self.letter_or_category) and  #starts with required letter
+                    not word.endswith('-') and  # Weed out word fragments
+                    '_' not in word and # Weed out, e.g., 'filledpause_um'
+                    word.lower() in self.lexicon.words_starting_with(self.letter_or_category)) #make sure the word is english
+        elif self.type == "SEMANTIC":
+            return word in self.lexicon.permissible_words
+        return False
+
+
+
+class VFClustAnalyzer(object):
+    """ Class used for holding the supporting data needed to analyze responses of a single kind.
+
+    Loading the supporting data (the CMU dictionary, the list of English words, permissible
+    words, LSA term vectors, custom similarity scores) takes far longer than clustering a
+    single response.  A VFClustAnalyzer loads everything required for a given category and
+    configuration once, and its analyze() method can then be called for any number of
+    responses of that category.
+    """
+    def __init__(self,
+                 response_category,
+                 collection_types=["cluster", "chain"],
+                 similarity_measures=["phone", "biphone", "lsa"],  #only the appropriate ones are run
+                 clustering_parameter=91,  #for lsa
+                 quiet=False,
+                 similarity_file = None,
+                 threshold = None,
+                 t2p_workers = 0,
+                 use_aligned_phones = False,
+                 lsa_sweep = False,
+                 word_tier = None,
+                 phone_tier = None,
+                 textgrid_cache = None,
+                 textgrid_cache_size = 100):
+        """Initialize an analyzer for phonetic or semantic fluency test responses of one category.
+
+        :param str response_category: a letter in the case of phonetic clustering, or a word category
+            (e.g. animals) in for phonetic clustering.
+        :param list collection_types: (optional) list of collection types to be used in clustering.
+            See VFClustEngine for details.
+        :param similarity_measures: (optional) a list of similarity measures to be used. By default, "lsa"
+            (Linear Semantic Analysis) is used for SEMANTIC clustering, and "phone" and "biphone" are used
+            for PHONETIC clustering.
+        :param clustering_parameter: (optional) parameters to be used in clustering
+        :param bool quiet: (optional) If set to True, suppresses output to screen.
+        :param similarity_file (optional): When doing semantic processing, this is the path of
+            a file containing custom term similarity scores that will be used for clustering.
+            If a custom file is used, the default LSA-based clustering will not be performed.
+        :param threshold (optional): Similarity cutoff used in clustering. Required if a custom
+            similarity file is specified, otherwise it overrides the built-in thresholds.
+        :param int t2p_workers: (optional) If greater than 0, words missing from the CMU dictionary
+            are transcribed by a pool of this many t2p processes (see T2PPool) rather than by the
+            in-process decision tree.
+        :param bool use_aligned_phones: (optional) If True, phonetic representations of words in .TextGrid
+            responses are built from their aligned phones instead of the CMU dictionary.
+        :param bool lsa_sweep: (optional) If True, the "lsa" similarity measure is replaced by one
+            measure per LSA dimensionality, "lsa50" to "lsa100", each clustered with the built-in
+            threshold of its dimensionality.  The LSA spaces are loaded as a single LSAStack.
+        :param str word_tier: (optional) name of the tier of words in .TextGrid responses. Defaults to
+            the first tier.
+        :param str phone_tier: (optional) name of the tier of phones in .TextGrid responses. Defaults
+            to the second tier.
+        :param str textgrid_cache: (optional) directory in which parsed .TextGrid responses are
+            cached (see TextGridCache), so that analyzing them again skips parsing.
+        :param textgrid_cache_size: (optional) cap on the size of the TextGrid cache, in megabytes.
+            The least recently used entries are deleted beyond it.
+
+        All data from the supporting data directory that is relevant to the category is loaded
+        here, so that it is not reloaded for every response.
+        """
+        self.valid_semantic_categories = ['animals', 'custom']
+        self.valid_phonetic_categories = ['a', 'f', 's', 'p']
+        self.valid_semantic_measures = ['lsa']
+        self.valid_phonemic_measures = ['phone', 'biphone']
+
+        #parse input arguments
+        self.quiet = quiet
+        self.response_category = response_category
+        self.collection_types = collection_types
+        self.t2p_workers = t2p_workers
+        self.use_aligned_phones = use_aligned_phones
+        self.lsa_sweep = lsa_sweep
+        self.word_tier = word_tier
+        self.phone_tier = phone_tier
+        self.textgrid_cache = None
+        if textgrid_cache:
+            self.textgrid_cache = TextGridCache(textgrid_cache,
+                                                max_size = int(float(textgrid_cache_size) * 2 ** 20))
+        self.letter = None
+        self.category = None
+        self.clustering_parameter = None
+        if self.response_category in self.valid_phonetic_categories:
+            self.type = "PHONETIC"
+            self.letter = response_category
+            self.similarity_measures = [m for m in similarity_measures if m in self.valid_phonemic_measures]
+
+        elif response_category in self.valid_semantic_categories:
+            self.type = "SEMANTIC"
+            self.category = response_category
+            self.clustering_parameter = int(clustering_parameter)
+            self.similarity_measures = [m for m in similarity_measures if m in self.valid_semantic_measures]
+        else:
+            raise VFClustException('Invalid response category!  You provided ' + response_category)
+
+        #custom threshold can be set no matter the similarity measure used
+        if threshold:
+            self.custom_threshold = threshold
+        else:
+            self.custom_threshold = None
+
+        #load supporting data
+        if not self.quiet: print
+
+        self.cmudict = None
+        self.english_words = None
+        self.names = None
+        self.lemmas = None
+        self.permissible_words = None
+        self.lsa_space = None
+        self.lsa_stack = None
+        self.custom_similarity_scores = None
+        self.phonetic_transcriber = None
+        self.word_forms = None
+
+        if self.type == "PHONETIC":
+            self.load_phonetic_information()
+        elif self.type == "SEMANTIC":
+            self.load_semantic_information(similarity_file)
+
+        # hash-indexed views of the word lists, so that tokens are classified in constant time
+        self.lexicon = Lexicon(english_words = self.english_words,
+                               permissible_words = self.permissible_words,
+                               names = self.names)
+        self.english_words = self.lexicon.english_words
+        self.permissible_words = self.lexicon.permissible_words
+        self.names = self.lexicon.names
+
+        if "lsa" in self.similarity_measures:
+            if self.lsa_sweep:
+                # one similarity measure per dimensionality, e.g. lsa50
+                position = self.similarity_measures.index("lsa")
+                self.similarity_measures[position:position + 1] = ["lsa" + str(d) for d in LSA_DIMENSIONALITIES]
+                self.load_lsa_stack()
+            else:
+                self.load_lsa_information()
+
+    def load_phonetic_information(self):
+        """Loads the CMU dictionary and the list of English words used in phonetic clustering."""
+        # Load the pronunciation table built from the modified CMU Pronouncing Dictionary (cmudict)
+        # and the English words, or else the modified cmudict itself
+        if PronunciationTable.exists(data_path):
+            self.cmudict = PronunciationTable.load(data_path)
+        else:
+            self.cmudict = pickle.load(open(os.path.join(data_path, 'modified_cmudict.dat'), 'rb'))
+        self.english_words = open(os.path.join(data_path,os.path.join('EOWL','english_words.txt')),'r').read().split()
+        # Load the t2p decision tree, or start the t2p workers, used for words missing from cmudict
+        if self.t2p_workers:
+            if not self.quiet:
+                print "Starting", self.t2p_workers, "t2p workers..."
+            self.phonetic_transcriber = T2PPool(workers = self.t2p_workers)
+        else:
+            self.phonetic_transcriber = LetterToPhoneme.get_decision_tree()
+        # Load the stems of the English words
+        self.word_forms = get_word_forms(['EOWL'])
+
+    def load_semantic_information(self, similarity_file):
+        """Loads the permissible words, tokenized responses and lemmas used in semantic clustering.
+
+        :param similarity_file: path of a custom similarity file, used if the category is 'custom'.
+        """
+        if self.category == 'animals':
+            if not self.quiet:
+                print "Loading tokenized responses..."
+            self.names = pickle.load(open(os.path.join(data_path, self.category + '_names_raw.dat'), 'rb'))
+            if not self.quiet:
+                print "Loading list of permissible words..."
+            with open(os.path.join(data_path, self.category + '_names.dat'), 'rb') as infile:
+                self.permissible_words = pickle.load(infile)
+        elif self.category == 'custom':
+
+            #read custom similarity file
+            self.similarity_measures = ["custom"] # Don't include LSA if custom similarity file is specified
+            self.custom_similarity_file = open(similarity_file, 'r').readlines()
+            # create a dict of tuples
+            self.custom_similarity_scores = {}
+            for entry in self.custom_similarity_file:
+                temp = entry.split(",")
+                words_split = temp[0].split(" ")
+                self.custom_similarity_scores[(words_split[0],words_split[1])] = float(temp[1])
+
+            #if using a custom file, make a new permissible words list
+            self.permissible_words = []
+            for w1, w2 in self.custom_similarity_scores:
+                self.permissible_words.append(w1)
+                self.permissible_words.append(w2)
+            #get rid of repeats
+            self.permissible_words = list(set(self.permissible_words))
+
+            self.names = self.permissible_words[:] #assume word list is already tokenized
+
+        #create lemmas, looked up in the precomputed table of the category if there is one
+        self.word_forms = get_word_forms([self.category])
+        self.lemmas = set(self.word_forms.lemmatize(w) for w in self.permissible_words)
+
+    def load_lsa_information(self):
+        """Loads the matrix of unit-normalized LSA term vectors for the permissible words.
+
+        The matrix is memory-mapped from a .npy file.  If the category only has the pickled
+        term vector dictionary, it is converted (and saved, if possible) the first time.
+        """
+
+        if int(self.clustering_parameter) not in LSA_DIMENSIONALITIES:
+            raise Exception('Only LSA dimensionalities in the range 50-100' +
+                            ' are supported.')
+        if not self.quiet:
+            print "Loading LSA term vectors..."
+        self.lsa_space = LSASpace.load_or_convert(os.path.join(data_path,
+                                                               self.category + '_term_vector_dictionaries'),
+                                                  self.clustering_parameter,
+                                                  quiet = self.quiet)
+
+    def load_lsa_stack(self):
+        """Loads the LSA term vectors of every dimensionality as a single memory-mapped tensor.
+
+        If the tensor has not been built yet, it is built from the spaces of each dimensionality
+        (and saved, if possible) the first time.
+        """
+        if not self.quiet:
+            print "Loading LSA term vectors of every dimensionality..."
+        self.lsa_stack = LSAStack.load_or_convert(os.path.join(data_path,
+                                                               self.category + '_term_vector_dictionaries'),
+                                                  LSA_DIMENSIONALITIES[0],
+                                                  LSA_DIMENSIONALITIES[-1],
+                                                  quiet = self.quiet)
+
+    def analyze(self, response_file_path, target_file_path=None, sweep_thresholds=None):
+        """Clusters a single response using the data already loaded by the analyzer.
+
+        :param str response_file_path: file path of the subject response (.csv or .TextGrid)
+            to be clustered.
+        :param target_file_path: (optional) path of the .csv output file to be produced.
+            If not given, no file is written.
+        :param list sweep_thresholds: (optional) list of similarity thresholds at which
+            collections are also computed.  See VFClustEngine.
+        :return: A dictionary of measures derived by clustering the response.
+        """
+        engine = VFClustEngine(response_category=self.response_category,
+                               response_file_path=response_file_path,
+                               target_file_path=target_file_path,
+                               analyzer=self,
+                               sweep_thresholds=sweep_thresholds)
+        return dict(engine.measures)
+
+    def sweep(self, response_file_path, thresholds, target_file_path=None):
+        """Clusters a single response at each of a list of similarity thresholds.
+
+        :param str response_file_path: file path of the subject response (.csv or .TextGrid)
+            to be clustered.
+        :param list thresholds: similarity thresholds, used for every similarity measure.
+        :param target_file_path: (optional) path of the .csv output file to be produced. The
+            measures at each threshold are written next to it, with "_sweep" appended to the name.
+        :return: A list with one dictionary per threshold, in increasing order of threshold,
+            holding the file_id, the threshold and the collection and timing measures at
+            that threshold.
+        """
+        engine = VFClustEngine(response_category=self.response_category,
+                               response_file_path=response_file_path,
+                               target_file_path=target_file_path,
+                               analyzer=self,
+                               sweep_thresholds=thresholds)
+        return engine.get_sweep_rows()
+
+    def close(self):
+        """Releases the resources of the analyzer that outlive it, i.e. stops the t2p workers (see
+        T2PPool) if there are any.  The analyzer cannot transcribe new words afterwards.
+        """
+        if hasattr(self.phonetic_transcriber, 'close'):
+            self.phonetic_transcriber.close()
+
+    def __enter__(self):
+        return self
 
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
 
 class VFClustEngine(object):
@@ -516,7 +884,9 @@ class VFClustEngine(object):
                  clustering_parameter=91,  #for lsa
                  quiet=False,
                  similarity_file = None,
-                 threshold = None):
+                 threshold = None,
+                 analyzer = None,
+                 sweep_thresholds = None):
 
         """Initialize for VFClust analysis of a verbal phonetic or semantic fluency test response.
 
@@ -553,13 +923,20 @@ class VFClustEngine(object):
             in conjunction with a custom similarity file. The value is used as a semantic
             similarity cutoff in clustering. This argument is required if a custom similarity
             file is specified.
+        :param analyzer (optional): A VFClustAnalyzer holding the supporting data for
+            response_category.  If given, the data it has already loaded is reused and the
+            configuration arguments above are taken from it. Otherwise, a new analyzer is created.
+        :param list sweep_thresholds (optional): A list of similarity thresholds.  If given, the
+            collection and timing measures are also computed at each of these thresholds, for
+            every similarity measure and collection type, reusing the similarity scores of the
+            response.  The results are held in self.sweep_measures, separately from self.measures.
 
 
         The initialization of a VFClustEngine object performs the following:
             - parse input arguments
             - loads relevant data from the supporting data directory to be used in
                 clustering, i.e. permissible words, LSA feature vectors, a dictionary of
-                English words, etc
+                English words, etc, unless a VFClustAnalyzer that already holds them is given
             - parses the subject response, generating a parsed_response object
             - performs clustering
             - produces a .csv file with clustering results.
@@ -569,7 +946,7 @@ class VFClustEngine(object):
         clustering are output to the .csv file.
 
         Methods are organized into two categories:
-            - load_ methods, in which data is loaded from disk
+            - load_ methods, in which data is loaded from disk. These belong to VFClustAnalyzer.
             - get_ methods, which print processing information to screen, perform preprocessing and call related
                 clustering methods. These are called from __init__
             - compute_ methods, which compute cluster-specific measures. These are called from get_ methdos.
@@ -582,10 +959,6 @@ class VFClustEngine(object):
         .. note:: At this point, the only category of semantic clustering available is "animals."
 
     """
-        self.valid_semantic_categories = ['animals', 'custom']
-        self.valid_phonetic_categories = ['a', 'f', 's', 'p']
-        self.valid_semantic_measures = ['lsa']
-        self.valid_phonemic_measures = ['phone', 'biphone']
         self.vowels = ['AA', 'AE', 'AH', 'AO', 'AW', 'AY', 'EH', 'ER', 'EY', 'IH', 'IY',
           'OW', 'OY', 'UH', 'UW']
         self.continuants = ['DH', 'F', 'L', 'M', 'N', 'NG', 'R', 'S', 'SH', 'TH', 'V',
@@ -594,29 +967,53 @@ class VFClustEngine(object):
         # it's above a realistic similarity threshold and is removed when taking the mean
         self.same_word_similarity = 999999999
 
+        #load supporting data, or reuse the data already loaded by the analyzer
+        if analyzer is None:
+            analyzer = VFClustAnalyzer(response_category,
+                                       collection_types=collection_types,
+                                       similarity_measures=similarity_measures,
+                                       clustering_parameter=clustering_parameter,
+                                       quiet=quiet,
+                                       similarity_file=similarity_file,
+                                       threshold=threshold)
+
         #parse input arguments
-        self.quiet = quiet
+        self.quiet = analyzer.quiet
         self.target_file = target_file_path
         self.response_format = os.path.splitext(response_file_path)[1][1:]
-        self.response_category = response_category
-        self.collection_types = collection_types
-        if self.response_category in self.valid_phonetic_categories:
-            self.type = "PHONETIC"
-            self.letter = response_category
-            self.similarity_measures = [m for m in similarity_measures if m in self.valid_phonemic_measures]
-
-        elif response_category in self.valid_semantic_categories:
-            self.type = "SEMANTIC"
-            self.category = response_category
-            self.clustering_parameter = int(clustering_parameter)
-            self.similarity_measures = [m for m in similarity_measures if m in self.valid_semantic_measures]
-        else:
-            raise VFClustException('Invalid response category!  You provided ' + response_category)
+        self.response_category = analyzer.response_category
+        self.collection_types = analyzer.collection_types
+        self.type = analyzer.type
+        self.letter = analyzer.letter
+        self.category = analyzer.category
+        self.clustering_parameter = analyzer.clustering_parameter
+        self.similarity_measures = analyzer.similarity_measures[:]
+        self.custom_threshold = analyzer.custom_threshold
+
+        self.cmudict = analyzer.cmudict
+        self.lexicon = analyzer.lexicon
+        self.english_words = analyzer.english_words
+        self.names = analyzer.names
+        self.lemmas = analyzer.lemmas
+        self.permissible_words = analyzer.permissible_words
+        self.lsa_space = analyzer.lsa_space
+        self.lsa_stack = analyzer.lsa_stack
+        self.phonetic_transcriber = analyzer.phonetic_transcriber
+        self.word_forms = analyzer.word_forms
+        self.use_aligned_phones = analyzer.use_aligned_phones
+        self.word_tier = analyzer.word_tier
+        self.phone_tier = analyzer.phone_tier
+        self.textgrid_cache = analyzer.textgrid_cache
+        self.custom_similarity_scores = analyzer.custom_similarity_scores
 
         #dictionary to hold the results
         self.measures = defaultdict(int)
         # makes the default value 0 instead of KeyError but otherwise just like a dict
 
+        #measures at each threshold of the sweep, if any
+        self.sweep_thresholds = sorted(set([float(t) for t in sweep_thresholds])) if sweep_thresholds else []
+        self.sweep_measures = dict((threshold, {}) for threshold in self.sweep_thresholds)
+
         #read subject response file
         if self.response_format not in ['csv', 'TextGrid']:
             raise VFClustException('Currently, VF-Clust only accepts responses in ' +
@@ -634,69 +1031,24 @@ class VFClustEngine(object):
         if self.response_format == 'TextGrid':
             # self.full_timed_response is a list of Word objects (defined in TextGridParser.py),
             #   which are defined by having a string for the word, start and end times.
-            self.full_timed_response = TextGrid(response_file_path).parse_words()
+            # The TextGrid may be in Praat's long or short text format, or binary.
+            if self.textgrid_cache is not None:
+                textgrid = self.textgrid_cache.load(response_file_path,
+                                                    word_tier = self.word_tier,
+                                                    phone_tier = self.phone_tier)
+            else:
+                textgrid = TextGrid(response_file_path,
+                                    word_tier = self.word_tier,
+                                    phone_tier = self.phone_tier)
+            self.full_timed_response = textgrid.parse_words()
+            # Durations and classes of the phones of the response, for the timing measures
+            self.phone_table = PhoneTable([phone.string for phone in textgrid.phones],
+                                          textgrid.phone_tier.starts, textgrid.phone_tier.ends,
+                                          textgrid.phone_ranges,
+                                          [self.vowels, self.continuants])
             # Set filename, less '.TextGrid', as file ID.
             self.measures['file_id'] = os.path.basename(response_file_path)[:-9]
 
-        #load supporting data
-        if not self.quiet: print
-
-        #custom threshold can be set no matter the similarity measure used
-        if threshold:
-            self.custom_threshold = threshold
-        else:
-            self.custom_threshold = None
-
-        if self.type == "PHONETIC":
-            self.names = None
-            self.lemmas = None
-            self.permissible_words = None
-            # Load the modified CMU Pronouncing Dictionary (cmudict)
-            self.cmudict = pickle.load(open(os.path.join(data_path, 'modified_cmudict.dat'), 'rb'))
-            self.english_words = open(os.path.join(data_path,os.path.join('EOWL','english_words.txt')),'r').read().split()
-        elif self.type == "SEMANTIC":
-            self.cmudict = None
-            self.english_words = None
-
-            if self.category == 'animals':
-                if not self.quiet:
-                    print "Loading tokenized responses..."
-                self.names = pickle.load(open(os.path.join(data_path, self.category + '_names_raw.dat'), 'rb'))
-                if not self.quiet:
-                    print "Loading list of permissible words..."
-                with open(os.path.join(data_path, self.category + '_names.dat'), 'rb') as infile:
-                    self.permissible_words = pickle.load(infile)
-            elif self.category == 'custom':
-
-                #read custom similarity file
-                self.similarity_measures = ["custom"] # Don't include LSA if custom similarity file is specified
-                self.custom_similarity_file = open(similarity_file, 'r').readlines()
-                # create a dict of tuples
-                self.custom_similarity_scores = {}
-                for entry in self.custom_similarity_file:
-                    temp = entry.split(",")
-                    words_split = temp[0].split(" ")
-                    self.custom_similarity_scores[(words_split[0],words_split[1])] = float(temp[1])
-
-                #if using a custom file, make a new permissible words list
-                self.permissible_words = []
-                for w1, w2 in self.custom_similarity_scores:
-                    self.permissible_words.append(w1)
-                    self.permissible_words.append(w2)
-                #get rid of repeats
-                self.permissible_words = list(set(self.permissible_words))
-
-                self.names = self.permissible_words[:] #assume word list is already tokenized
-
-            #create lemmas
-            self.lemmas = []
-            for w in self.permissible_words:
-                self.lemmas.append(lemmatizer.lemmatize(w))
-            self.lemmas = set(self.lemmas)
-
-        if "lsa" in self.similarity_measures:
-            self.load_lsa_information()
-
         # PARSING AND COUNTING
         # iterable, ordered collection of Units. Need to pass in information required for parsing.
         self.parsed_response = ParsedResponse(self.type,
@@ -706,7 +1058,11 @@ class VFClustEngine(object):
                                               english_words = self.english_words,
                                               lemmas = self.lemmas,
                                               names = self.names,
-                                              permissible_words = self.permissible_words)
+                                              permissible_words = self.permissible_words,
+                                              lexicon = self.lexicon,
+                                              phonetic_transcriber = self.phonetic_transcriber,
+                                              use_aligned_phones = self.use_aligned_phones,
+                                              word_forms = self.word_forms)
         if self.response_format == "csv":
             self.parsed_response.create_from_csv(self.raw_response)
         elif self.response_format == "TextGrid":
@@ -715,13 +1071,28 @@ class VFClustEngine(object):
         self.get_raw_counts() #using non-cleaned response, i.e. include all words
         self.parsed_response.clean()  # combine words, get rid of irrevelant input, etc
 
+        if self.response_format == 'TextGrid':
+            # Timing and vowel/continuant durations of each cleaned Unit, from the first word it
+            #   was made from, shared by the timing measures of every collection type.
+            units = self.parsed_response.units
+            self.unit_start_times = units.column('start_times')
+            self.unit_end_times = units.column('end_times')
+            self.unit_phone_durations, self.unit_phone_counts = \
+                self.phone_table.unit_totals(units.column('timed_indices'))
+
         #CLUSTERING
+        # similarity matrices of the response in every LSA space of the stack, computed together when first needed
+        self.lsa_similarity_matrices = None
         #do calculations for every combination of similarity measure and collection type (cluster, chain, etc).
         for similarity_measure in self.similarity_measures:
             #calculate similarity measures between words
             self.current_similarity_measure = similarity_measure
             self.similarity_threshold = None
             self.similarity_scores = []
+            # scores between Units are computed at most once per measure, and shared by all collection types
+            self.similarity_matrix = SimilarityMatrix(len(self.parsed_response),
+                                                      self.get_similarity_kernel(),
+                                                      symmetric = self.current_similarity_measure != "custom")
             if not self.quiet:
                 print
                 print
@@ -748,12 +1119,16 @@ class VFClustEngine(object):
                 #calculate collection metrics
                 self.current_collection_type = collection_type
                 self.collection_indices = []
+                self.collection_intervals = None
                 self.collection_list = []
                 self.collection_sizes = []
                 self.collection_sizes_no_singletons = []
                 self.get_collections()
                 self.get_collection_measures()
 
+            if self.sweep_thresholds:
+                self.get_threshold_sweep()
+
         self.print_output()
 
 
@@ -763,23 +1138,6 @@ class VFClustEngine(object):
     ###########                                  ###########
     ########################################################
 
-    def load_lsa_information(self):
-        """Loads a dictionary from disk that maps permissible words to their LSA term vectors."""
-
-        if not (49 < int(self.clustering_parameter) < 101):
-            raise Exception('Only LSA dimensionalities in the range 50-100' +
-                            ' are supported.')
-        if not self.quiet:
-            print "Loading LSA term vectors..."
-        #the protocol2 used the pickle highest protocol and this one is a smaller file
-        with open(os.path.join(data_path, self.category + '_' +
-                os.path.join('term_vector_dictionaries',
-                             'term_vectors_dict' +
-                                     str(self.clustering_parameter) + '_cpickle.dat')),
-                  'rb') as infile:
-            self.term_vectors = pickle.load(infile)
-
-
     def get_similarity_measures(self):
         """Helper function for computing similarity measures."""
         if not self.quiet:
@@ -805,6 +1163,14 @@ class VFClustEngine(object):
             print_table(table_contents)
 
 
+    def get_threshold_sweep(self):
+        """Helper function for computing collection measures at every threshold of the sweep."""
+        if not self.quiet:
+            print
+            print "Sweeping", len(self.sweep_thresholds), self.current_similarity_measure, "thresholds..."
+
+        self.compute_threshold_sweep()
+
     def get_collection_measures(self):
         """Helper function for calculating measurements derived from clusters/chains/collections"""
 
@@ -832,6 +1198,25 @@ class VFClustEngine(object):
         self.compute_duration_measures()
 
 
+    def is_permissible_word(self, word):
+        """Returns True if a token of the response meets the criteria of the fluency task.
+
+        :param str word: text of the token.
+
+        In PHONETIC clustering, a permissible word is an English word starting with the right
+        letter that is not a tag, filled pause or false start.  In SEMANTIC clustering, it is a
+        permissible word of the category, e.g. an animal name.
+        """
+        if self.type == "PHONETIC":
+            return (word.startswith(self.letter) and
+                    "T_" not in word and "E_" not in word and "!" not in word and # Weed out tags
+                    "FILLEDPAUSE_" not in word and # Weed out filled pauses
+                    not word.endswith('-') and # Weed out false starts
+                    word.lower() in self.lexicon.words_starting_with(self.letter))  #weed out non-words
+        elif self.type == "SEMANTIC":
+            #automatically weed out all non-semantically-appropriate responses
+            return word in self.lexicon.permissible_words
+        return False
 
     def get_raw_counts(self):
         """Determines counts for unique words, repetitions, etc using the raw text response.
@@ -864,66 +1249,29 @@ class VFClustEngine(object):
                 stem repetitions and exact repetitions.
         """
 
-        #for making the table at the end
-        words = []
-        labels = []
-        words_said = set()
-
-        # Words like "polar_bear" as one semantically but two phonetically
-        # Uncategorizable words are counted as asides
-        for unit in self.parsed_response:
-            word = unit.text
-            test = False
-            if self.type == "PHONETIC":
-                test = (word.startswith(self.letter) and
-                        "T_" not in word and "E_" not in word and "!" not in word and # Weed out tags
-                        "FILLEDPAUSE_" not in word and # Weed out filled pauses
-                        not word.endswith('-') and # Weed out false starts
-                        word.lower() in self.english_words)  #weed out non-words
-            elif self.type == "SEMANTIC":
-                #automatically weed out all non-semantically-appropriate responses
-                test = (word in self.permissible_words)
-
-            if test:
-                self.measures['COUNT_total_words'] += 1
-                self.measures['COUNT_permissible_words'] += 1
-                if any(word == w for w in words_said):
-                    self.measures['COUNT_exact_repetitions'] += 1
-                    labels.append('EXACT REPETITION')
-                elif any(stemmer.stem(word) == stemmer.stem(w) for w in words_said):
-                    self.measures['COUNT_stem_repetitions'] += 1
-                    labels.append('STEM REPETITION')
-                else:
-                    labels.append('PERMISSIBLE WORD')
-                words_said.add(word)
-                words.append(word)
-            elif word.lower().startswith('e_'):
-                self.measures['COUNT_examiner_words'] += 1
-                words.append(word)
-                labels.append('EXAMINER WORD')
-            elif word.endswith('-'):
-                self.measures['COUNT_word_fragments'] += 1
-                words.append(word)
-                labels.append('WORD FRAGMENT')
-            elif word.lower().startswith('filledpause'):
-                self.measures['COUNT_filled_pauses'] += 1
-                words.append(word)
-                labels.append('FILLED PAUSE')
-            elif word.lower() not in ['!sil', 't_noise', 't_cough', 't_lipsmack', 't_breath']:
-                self.measures['COUNT_total_words'] += 1
-                self.measures['COUNT_asides'] += 1
-                words.append(word)
-                labels.append('ASIDE')
+        classifier = TokenClassifier(self.is_permissible_word, self.word_forms.stem)
+        classifier.classify_all(unit.text for unit in self.parsed_response)
 
         if not self.quiet:
             print
             print "Labels:"
-            print_table([(word,label) for word,label in zip(words,labels)])
-
-        self.measures['COUNT_unique_permissible_words'] = \
-            self.measures['COUNT_permissible_words'] - \
-            self.measures['COUNT_exact_repetitions'] - \
-            self.measures['COUNT_stem_repetitions']
+            print_table(zip(classifier.words, classifier.labels()))
+
+        counts = classifier.counts()
+        permissible_words = counts[PERMISSIBLE_WORD] + counts[EXACT_REPETITION] + counts[STEM_REPETITION]
+        # Uncategorizable words are counted as asides; the measures of other
+        # labels that never occur are left out of the results
+        for key, count in [('COUNT_total_words', permissible_words + counts[ASIDE]),
+                           ('COUNT_examiner_words', counts[EXAMINER_WORD]),
+                           ('COUNT_word_fragments', counts[WORD_FRAGMENT]),
+                           ('COUNT_filled_pauses', counts[FILLED_PAUSE]),
+                           ('COUNT_asides', counts[ASIDE])]:
+            if count:
+                self.measures[key] += int(count)
+        self.measures['COUNT_permissible_words'] += int(permissible_words)
+        self.measures['COUNT_exact_repetitions'] += int(counts[EXACT_REPETITION])
+        self.measures['COUNT_stem_repetitions'] += int(counts[STEM_REPETITION])
+        self.measures['COUNT_unique_permissible_words'] = int(counts[PERMISSIBLE_WORD])
 
         if not self.quiet:
             print
@@ -977,7 +1325,8 @@ class VFClustEngine(object):
                 as the COSINE of the respective term vectors for the first and
                 second word in an LSA space of the specified clustering_parameter.
                 Unlike the PHONETIC methods, this method uses the .text property
-                of the input Unit objects.
+                of the input Unit objects.  "lsa50" to "lsa100" are the same, in the
+                LSA space of the dimensionality in their name.
 
         """
 
@@ -985,21 +1334,7 @@ class VFClustEngine(object):
             word1 = unit1.phonetic_representation
             word2 = unit2.phonetic_representation
             if self.current_similarity_measure == "phone":
-                word1_length, word2_length = len(word1), len(word2)
-                if word1_length > word2_length:
-                    # Make sure n <= m, to use O(min(n,m)) space
-                    word1, word2 = word2, word1
-                    word1_length, word2_length = word2_length, word1_length
-                current = range(word1_length + 1)
-                for i in range(1, word2_length + 1):
-                    previous, current = current, [i] + [0] * word1_length
-                    for j in range(1, word1_length + 1):
-                        add, delete = previous[j] + 1, current[j - 1] + 1
-                        change = previous[j - 1]
-                        if word1[j - 1] != word2[i - 1]:
-                            change += 1
-                        current[j] = min(add, delete, change)
-                phonetic_similarity_score = 1 - current[word1_length] / word2_length
+                phonetic_similarity_score = EditDistance.phonetic_similarity(word1, word2)
                 return phonetic_similarity_score
 
             elif self.current_similarity_measure == "biphone":
@@ -1013,16 +1348,11 @@ class VFClustEngine(object):
             word1 = unit1.text
             word2 = unit2.text
             if self.current_similarity_measure == "lsa":
-                w1_vec = self.term_vectors[word1]
-                w2_vec = self.term_vectors[word2]
-                # semantic_relatedness_score = (numpy.dot(w1_vec, w2_vec) /
-                #                               numpy.linalg.norm(w1_vec) /
-                #                               numpy.linalg.norm(w2_vec))
-                dot = sum([w1*w2 for w1,w2 in zip(w1_vec, w2_vec)])
-                norm1 = sqrt(sum([w*w for w in w1_vec]))
-                norm2 = sqrt(sum([w*w for w in w2_vec]))
-                semantic_relatedness_score =  dot/(norm1 * norm2)
+                # term vectors are stored normalized, so the cosine is just the dot product
+                semantic_relatedness_score = self.lsa_space.similarity(word1, word2)
                 return semantic_relatedness_score
+            elif self.get_lsa_dimensionality() is not None:
+                return self.lsa_stack.similarity(word1, word2, self.get_lsa_dimensionality())
             elif self.current_similarity_measure == "custom":
                 #look it up in dict
                 try:
@@ -1041,10 +1371,66 @@ class VFClustEngine(object):
 
         return None  #shouldn't happen
 
+    def get_lsa_dimensionality(self):
+        """ Returns the LSA dimensionality of the current similarity measure, or None if it is not LSA-based.
+
+        "lsa" uses self.clustering_parameter, and "lsa50" to "lsa100" use the dimensionality in
+        their name.
+        """
+        measure = self.current_similarity_measure
+        if measure == "lsa":
+            return self.clustering_parameter
+        if measure.startswith("lsa") and measure[3:].isdigit():
+            return int(measure[3:])
+        return None
+
+    def get_similarity_kernel(self):
+        """ Returns a function that computes similarity scores for a batch of pairs of Units.
+
+        :return: A function taking two integer arrays of equal length, rows and cols, and
+            returning the similarity score of self.parsed_response[rows[k]] compared to
+            self.parsed_response[cols[k]] for every k, as used by SimilarityMatrix.
+
+        The scores are the same as those of compute_similarity_score for the currently active
+        similarity measure.  "lsa" scores are read from a single product of the response's term
+        vectors, and "lsa50" to "lsa100" scores from a single batched product over the LSA stack
+        shared by all of them, "phone" scores use a bit-parallel edit distance over integer-encoded phonetic
+        representations, and "biphone" scores are compared for all pairs at once; "custom"
+        scores are looked up pair by pair.
+        """
+        units = self.parsed_response
+        if self.type == "SEMANTIC" and self.current_similarity_measure == "lsa":
+            gram = []
+            def kernel(rows, cols):
+                if not gram:
+                    gram.append(self.lsa_space.similarity_matrix(units.texts()))
+                return gram[0][rows, cols]
+        elif self.type == "SEMANTIC" and self.get_lsa_dimensionality() is not None:
+            position = self.lsa_stack.positions[self.get_lsa_dimensionality()]
+            def kernel(rows, cols):
+                if self.lsa_similarity_matrices is None:
+                    self.lsa_similarity_matrices = self.lsa_stack.similarity_matrices(units.texts())
+                return self.lsa_similarity_matrices[position][rows, cols]
+        elif self.type == "PHONETIC" and self.current_similarity_measure == "phone":
+            codes, lengths = EditDistance.encode(units.phonetic_representations())
+            def kernel(rows, cols):
+                return EditDistance.phonetic_similarities(codes, lengths, rows, cols)
+        elif self.type == "PHONETIC" and self.current_similarity_measure == "biphone":
+            phonetic_representations = units.phonetic_representations()
+            initial = np.array([word[:2] for word in phonetic_representations] or [''], dtype=object)
+            final = np.array([word[-2:] for word in phonetic_representations] or [''], dtype=object)
+            def kernel(rows, cols):
+                return ((initial[rows] == initial[cols]) | (final[rows] == final[cols])).astype(np.float64)
+        else:
+            views = units.unit_list
+            def kernel(rows, cols):
+                return [self.compute_similarity_score(views[i], views[j]) for i, j in zip(rows, cols)]
+        return kernel
+
     def compute_similarity_scores(self):
         """ Produce a list of similarity scores for each contiguous pair in a response.
 
-        Calls compute_similarity_score method for every adjacent pair of words. The results
+        Reads the score of every adjacent pair of words from self.similarity_matrix. The results
         are not used in clustering; this is merely to provide a visual representation to
         print to the screen.
 
@@ -1053,10 +1439,7 @@ class VFClustEngine(object):
                 words. At this point this list is never used outside of this method.
         """
 
-        for i,unit in enumerate(self.parsed_response):
-            if i < len(self.parsed_response) - 1:
-                next_unit = self.parsed_response[i + 1]
-                self.similarity_scores.append(self.compute_similarity_score(unit, next_unit))
+        self.similarity_scores = self.similarity_matrix.adjacent().tolist()
 
         if not self.quiet:
             print self.current_similarity_measure, "similarity scores (adjacent) -- higher is closer:"
@@ -1082,12 +1465,16 @@ class VFClustEngine(object):
                 the indices of each element of each collection
             - self.collection_list: populated with a list lists, each list containing
                 Unit objects belonging to each collection
+            - self.collection_intervals: populated with a k x 2 array of the (start, end)
+                interval of Unit indices of each collection, i.e. its Units are
+                parsed_response[start:end]
 
         There are two types of collections currently implemented:
         - cluster: every entry in a cluster is sufficiently similar to every other entry
         - chain: every entry in a chain is sufficiently similar to adjacent entries
 
-        Similarity between words is calculated using the compute_similarity_score method.
+        Similarity between words is read from self.similarity_matrix, which holds the scores
+        of the compute_similarity_score method for every pair of words.
         Scores between words are then thresholded and binarized using empirically-derived
         thresholds (see: ???). Overlap of clusters is allowed (a word can be part of
         multiple clusters), but overlapping chains are not possible, as any two adjacent
@@ -1133,7 +1520,7 @@ class VFClustEngine(object):
                 self.similarity_threshold = 1
 
         elif self.type == "SEMANTIC":
-            if self.current_similarity_measure == "lsa":
+            if self.get_lsa_dimensionality() is not None:
                 if self.category == 'animals':
                     thresholds = {'50': 0.229306542684, '51': 0.22594687203200001,
                                   '52': 0.22403235205800001, '53': 0.214750475853,
@@ -1162,62 +1549,77 @@ class VFClustEngine(object):
                                   '98': 0.13619473881800001, '99': 0.136671316751,
                                   '100': 0.135307208304}
 
-                    self.similarity_threshold = thresholds[str(self.clustering_parameter)]
+                    self.similarity_threshold = thresholds[str(self.get_lsa_dimensionality())]
             elif self.current_similarity_measure == "custom":
                 self.similarity_threshold = self.custom_threshold
 
         if not self.quiet:
             print "Similarity threshold:", self.similarity_threshold
 
-        for index, unit in enumerate(self.parsed_response):
-            next_word_index = index + 1
-            collection = [unit] # begin current collection
-            collection_index = [index] # begin current collection index list
-            collection_terminus_found = False
-            while not collection_terminus_found:
-                if next_word_index < len(self.parsed_response):
-                    # Check whether last word in attempt has been read
-                    test = False
-                    if self.current_collection_type == "cluster":
-                        # Check whether next word is related to
-                        # every other word in cluster
-                        unit2 = self.parsed_response[next_word_index]
-                        test = all([self.compute_similarity_score(unit2, other_unit) >= self.similarity_threshold \
-                                for other_unit in collection])
-                    elif self.current_collection_type == "chain":
-                        #check whether the word is related to the one before it
-                        #remember that we're testing words at the end of the chain, and creating new links
-                        unit1 = self.parsed_response[next_word_index - 1]
-                        unit2 = self.parsed_response[next_word_index]
-                        test = self.compute_similarity_score(unit1,unit2) >= self.similarity_threshold
-                    if test:
-                        #add NEXT word
-                        collection.append(self.parsed_response[next_word_index])
-                        collection_index.append(next_word_index)
-                        next_word_index += 1
-                    else:
-
-                        # Check whether cluster is subsequence of cluster
-                        # already added to list
-                        collection_index = ' '.join([str(w) for w in collection_index])
-                        if collection_index not in str(self.collection_indices):
-                            self.collection_indices.append(collection_index)
-                            self.collection_sizes.append(len(collection))
-                        collection_terminus_found = True
-                else:
-                    # Execute if word is last word in attempt
-                    collection_index = ' '.join([str(w) for w in collection_index])
-                    if collection_index not in str(self.collection_indices):
-                        self.collection_indices.append(collection_index)
-                        self.collection_sizes.append(len(collection))
-                    collection_terminus_found = True
+        if self.current_collection_type == "chain":
+            # chains are the maximal runs of adjacent Units above the threshold
+            self.collection_intervals = find_chains(len(self.parsed_response),
+                                                    self.similarity_matrix.adjacent(),
+                                                    self.similarity_threshold)
+        elif self.current_collection_type == "cluster":
+            # clusters are grown from the above-threshold scores of every Unit compared to earlier Units
+            self.similarity_matrix.compute_all()
+            with np.errstate(invalid='ignore'):
+                linked = self.similarity_matrix.scores >= self.similarity_threshold
+            self.collection_intervals = find_clusters(linked)
 
+        self.set_collections(self.collection_intervals)
+
+    def set_collections(self, intervals):
+        """ Sets the collections of the current collection type from an array of intervals.
+
+        :param intervals: k x 2 array of the (start, end) interval of Unit indices of each
+            collection, e.g. as returned by CollectionEngine.find_chains().
+
+        Modifies self.collection_intervals, self.collection_indices, self.collection_sizes and
+        self.collection_list (see compute_collections()).
+        """
+        self.collection_intervals = intervals
+        self.collection_indices = [' '.join([str(w) for w in range(start, end)]) for start, end in intervals]
+        self.collection_sizes = [int(end - start) for start, end in intervals]
         # Get a list of collections and their positions in the response.
-        for index in self.collection_indices:
-            collection = []
-            for i in index.split():
-                collection.append(self.parsed_response[int(i)])
-            self.collection_list.append(collection)
+        self.collection_list = [self.parsed_response[start:end] for start, end in intervals]
+
+    def compute_threshold_sweep(self):
+        """ Computes the collection and timing measures at every threshold in self.sweep_thresholds.
+
+        The similarity scores of the current similarity measure are computed once, and the
+        collections at every threshold are derived from them together (see
+        CollectionEngine.sweep_collections()).  For each collection type and threshold, the
+        measures of compute_collection_measures() and compute_duration_measures() are added to
+        self.sweep_measures[threshold].  self.measures is left unchanged.
+        """
+        measures = self.measures
+        self.similarity_matrix.compute_all()
+        for collection_type in self.collection_types:
+            self.current_collection_type = collection_type
+            collections = sweep_collections(collection_type, self.similarity_matrix.scores, self.sweep_thresholds)
+            for threshold, intervals in zip(self.sweep_thresholds, collections):
+                self.measures = defaultdict(int)
+                self.similarity_threshold = threshold
+                self.set_collections(intervals)
+                self.compute_collection_measures()
+                self.compute_collection_measures(no_singletons = True)
+                self.compute_duration_measures()
+                self.sweep_measures[threshold].update(self.measures)
+        self.measures = measures
+
+    def get_sweep_rows(self):
+        """ Returns the measures of the threshold sweep as a list with one dictionary per threshold.
+
+        Each dictionary holds the file_id, the threshold and the measures at that threshold.
+        """
+        rows = []
+        for threshold in self.sweep_thresholds:
+            row = {'file_id': self.measures['file_id'], 'threshold': threshold}
+            row.update(self.sweep_measures[threshold])
+            rows.append(row)
+        return rows
 
 
 
@@ -1229,36 +1631,44 @@ class VFClustEngine(object):
     ########################################################
 
     def compute_pairwise_similarity_score(self):
-        """Computes the average pairwise similarity score between all pairs of Units.
+        """Computes summary statistics of the similarity scores between all pairs of Units.
 
         The pairwise similarity is calculated as the sum of similarity scores for all pairwise
         word pairs in a response -- except any pair composed of a word and
         itself -- divided by the total number of words in an attempt. I.e.,
         the mean similarity for all pairwise word pairs.
 
-        Adds the following measures to the self.measures dictionary:
-            - COLLECTION_collection_pairwise_similarity_score_mean: mean of pairwise similarity scores
+        The scores of every pair (i, j) with i < j are read from the upper triangle of
+        self.similarity_matrix, and pairs scored as the same word (self.same_word_similarity)
+        are masked out before all statistics are computed.
+
+        Adds the following measures to the self.measures dictionary, prefaced by
+        COLLECTION_(similarity_measure)_pairwise_similarity_score_:
+            - mean: mean of pairwise similarity scores
+            - median: median of pairwise similarity scores
+            - std: (population) standard deviation of pairwise similarity scores
+            - percentile_10, percentile_25, percentile_75, percentile_90: percentiles of
+                pairwise similarity scores
 
         .. todo: divide by (count-1)?
         """
-        pairs = []
-        all_scores = []
-        for i, unit in enumerate(self.parsed_response):
-            for j, other_unit in enumerate(self.parsed_response):
-                if i != j:
-                    pair = (i, j)
-                    rev_pair = (j, i)
-                    if pair not in pairs and rev_pair not in pairs:
-                        score = self.compute_similarity_score(unit, other_unit)
-                        pairs.append(pair)
-                        pairs.append(rev_pair)
-                        all_scores.append(score)
-
-        #remove any "same word" from the mean
-        all_scores = [i for i in all_scores if i != self.same_word_similarity]
-        self.measures["COLLECTION_" + self.current_similarity_measure + "_pairwise_similarity_score_mean"] = get_mean(
-            all_scores) \
-            if len(pairs) > 0 else 'NA'
+        prefix = "COLLECTION_" + self.current_similarity_measure + "_pairwise_similarity_score_"
+        percentiles = [10, 25, 75, 90]
+
+        scores = self.similarity_matrix.upper_triangle()
+        #remove any "same word" from the statistics
+        scores = scores[scores != self.same_word_similarity]
+
+        if len(scores) > 0:
+            values = np.percentile(scores, [50] + percentiles)
+            self.measures[prefix + 'mean'] = float(scores.mean())
+            self.measures[prefix + 'median'] = float(values[0])
+            self.measures[prefix + 'std'] = float(scores.std())
+            for percentile, value in zip(percentiles, values[1:]):
+                self.measures[prefix + 'percentile_' + str(percentile)] = float(value)
+        else:
+            for measure in ['mean', 'median', 'std'] + ['percentile_' + str(p) for p in percentiles]:
+                self.measures[prefix + measure] = 'NA'
 
 
     def compute_collection_measures(self, no_singletons=False):
@@ -1314,6 +1724,12 @@ class VFClustEngine(object):
 
         if self.response_format == 'TextGrid':
 
+            # all collection timing measures are aggregated at once from the per-Unit columns
+            self.collection_timing = collection_timing(self.collection_intervals,
+                                                       self.unit_start_times, self.unit_end_times,
+                                                       self.unit_phone_durations,
+                                                       self.unit_phone_counts)
+
             self.compute_response_vowel_duration("TIMING_")  #prefixes don't need collection or measure type
             self.compute_response_continuant_duration("TIMING_")
             self.compute_between_collection_interval_duration(prefix)
@@ -1335,15 +1751,9 @@ class VFClustEngine(object):
             - TIMING_(similarity_measure)_(collection_type)_response_vowel_duration_mean: average
                 vowel duration of all vowels in the response.
         """
-        durations = []
-        for word in self.full_timed_response:
-            if word.phones:
-                for phone in word.phones:
-                    if phone.string in self.vowels:
-                        durations.append(phone.end - phone.start)
-
-        self.measures[prefix + 'response_vowel_duration_mean'] = get_mean(durations) \
-            if len(durations) > 0 else 'NA'
+        # computed once per response, when the phone table is built
+        mean = self.phone_table.response_means[0]
+        self.measures[prefix + 'response_vowel_duration_mean'] = mean if mean is not None else 'NA'
 
         if not self.quiet:
             print "Mean response vowel duration:", self.measures[prefix + 'response_vowel_duration_mean']
@@ -1358,15 +1768,9 @@ class VFClustEngine(object):
             - TIMING_(similarity_measure)_(collection_type)_response_continuant_duration_mean: average
                 vowel duration of all vowels in the response.
         """
-        durations = []
-        for word in self.full_timed_response:
-            if word.phones:
-                for phone in word.phones:
-                    if phone.string in self.continuants:
-                        durations.append(phone.end - phone.start)
-
-        self.measures[prefix + 'response_continuant_duration_mean'] = get_mean(durations) \
-            if len(durations) > 0 else 'NA'
+        # computed once per response, when the phone table is built
+        mean = self.phone_table.response_means[1]
+        self.measures[prefix + 'response_continuant_duration_mean'] = mean if mean is not None else 'NA'
 
         if not self.quiet:
             print "Mean response continuant duration:", self.measures[prefix + 'response_continuant_duration_mean']
@@ -1393,25 +1797,12 @@ class VFClustEngine(object):
 
         """
 
-        durations = []  # duration of each collection
-        for collection in self.collection_list:
-            # Entry, with timing, in timed_response for first word in collection
-            start = collection[0].start_time
-            # Entry, with timing, in timed_response for last word in collection
-            end = collection[-1].end_time
-            durations.append((start, end))
-
-        # calculation between-duration intervals
-        interstices = [durations[i + 1][0] - durations[i][1] for i, d in enumerate(durations[:-1])]
-
-        # Replace negative interstices (for overlapping clusters) with
-        # interstices of duration 0
-        for i, entry in enumerate(interstices):
-            if interstices[i] < 0:
-                interstices[i] = 0
-
-        self.measures[prefix + 'between_collection_interval_duration_mean'] = get_mean(interstices) \
-            if len(interstices) > 0 else 'NA'
+        # (start time of first Unit, end time of last Unit) of each collection
+        durations = self.collection_timing['spans']
+        # negative interstices (for overlapping clusters) are already replaced by 0
+        interstices = self.collection_timing['between_intervals']
+        mean = self.collection_timing['between_mean']
+        self.measures[prefix + 'between_collection_interval_duration_mean'] = mean if mean is not None else 'NA'
 
         if not self.quiet:
             print
@@ -1440,17 +1831,9 @@ class VFClustEngine(object):
             - TIMING_(similarity_measure)_(collection_type)_within_collection_interval_duration_mean
         """
 
-        interstices = []
-        for cluster in self.collection_list:
-            # Make sure cluster is not a singleton
-            if len(cluster) > 1:
-                for i in range(len(cluster)):
-                    if i != len(cluster) - 1:
-                        interstice = cluster[i+1].start_time - cluster[i].end_time
-                        interstices.append(interstice)
-
-        self.measures[prefix + 'within_collection_interval_duration_mean'] = get_mean(interstices) \
-            if len(interstices) > 0 else 'NA'
+        # singleton collections have no interstices
+        mean = self.collection_timing['within_interval_mean']
+        self.measures[prefix + 'within_collection_interval_duration_mean'] = mean if mean is not None else 'NA'
 
         if not self.quiet:
             print "Mean within-" + self.current_similarity_measure + "-" + self.current_collection_type + \
@@ -1475,17 +1858,8 @@ class VFClustEngine(object):
             prefix += "no_singletons_"
             min_size = 1
 
-        durations = []
-        for cluster in self.collection_list:
-            if len(cluster) >= min_size:
-                for word in cluster:
-                    word = self.full_timed_response[word.index_in_timed_response]
-                    for phone in word.phones:
-                        if phone.string in self.vowels:
-                            durations.append(phone.end - phone.start)
-
-        self.measures[prefix + 'within_collection_vowel_duration_mean'] = get_mean(durations) \
-            if len(durations) > 0 else 'NA'
+        mean = self.collection_timing['phone_means'][min_size][0]
+        self.measures[prefix + 'within_collection_vowel_duration_mean'] = mean if mean is not None else 'NA'
 
         if not self.quiet:
             if no_singletons:
@@ -1514,17 +1888,8 @@ class VFClustEngine(object):
             prefix += "no_singletons_"
             min_size = 1
 
-        durations = []
-        for cluster in self.collection_list:
-            if len(cluster) >= min_size:
-                for word in cluster:
-                    word = self.full_timed_response[word.index_in_timed_response]
-                    for phone in word.phones:
-                        if phone.string in self.continuants:
-                            durations.append(phone.end - phone.start)
-
-        self.measures[prefix + 'within_collection_continuant_duration_mean'] = get_mean(durations) \
-            if len(durations) > 0 else 'NA'
+        mean = self.collection_timing['phone_means'][min_size][1]
+        self.measures[prefix + 'within_collection_continuant_duration_mean'] = mean if mean is not None else 'NA'
 
         if not self.quiet:
             if no_singletons:
@@ -1592,6 +1957,33 @@ class VFClustEngine(object):
                 writer.writerow([self.measures["file_id"]] +
                                 [self.measures["_".join(e.split('_')[1:])] for e in header[1:]])
 
+            if self.sweep_thresholds:
+                self.write_sweep_output(os.path.splitext(self.target_file)[0] + "_sweep.csv")
+
+    def write_sweep_output(self, target_file):
+        """ Writes the measures of the threshold sweep to a .csv file, one row per threshold.
+
+        :param str target_file: path of the .csv file to be produced.
+        """
+        write_sweep_rows(target_file, self.get_sweep_rows(), self.type)
+
+
+
+def write_sweep_rows(target_file, rows, response_type):
+    """ Writes the measures of threshold sweeps to a .csv file, one row per threshold.
+
+    :param str target_file: path of the .csv file to be produced.
+    :param list rows: dictionaries holding the file_id, threshold and measures at that threshold,
+        e.g. as returned by VFClustEngine.get_sweep_rows().
+    :param str response_type: type of the measures ("PHONETIC" or "SEMANTIC"), prefixed to their names.
+    """
+    keys = sorted(set(key for row in rows for key in row if 'COLLECTION_' in key)) + \
+           sorted(set(key for row in rows for key in row if 'TIMING_' in key))
+    with open(target_file, 'w') as outfile:
+        writer = csv.writer(outfile, quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(['file_id', 'threshold'] + [response_type + "_" + key for key in keys])
+        for row in rows:
+            writer.writerow([row['file_id'], row['threshold']] + [row.get(key, 'NA') for key in keys])
 
 
 def get_duration_measures(source_file_path,
@@ -1600,7 +1992,15 @@ def get_duration_measures(source_file_path,
                           semantic=False,
                           quiet=False,
                           similarity_file = None,
-                          threshold = None):
+                          threshold = None,
+                          t2p_workers = 0,
+                          aligned_phones = False,
+                          sweep_thresholds = None,
+                          lsa_sweep = False,
+                          word_tier = None,
+                          phone_tier = None,
+                          textgrid_cache = None,
+                          textgrid_cache_size = 100):
     """Parses input arguments and runs clustering algorithm.
 
     :param source_file_path: Required. Location of the .csv or .TextGrid file to be
@@ -1621,6 +2021,27 @@ def get_duration_measures(source_file_path,
         similarity cutoff in clustering. This argument is required if a custom similarity
         file is specified.  This argument can also be used to override the built-in
         cluster/chain thresholds.
+    :param t2p_workers (optional): When doing phonemic processing, the number of t2p
+        processes used to transcribe words missing from the CMU dictionary. If 0 (default),
+        words are transcribed in-process.
+    :param aligned_phones (optional): When doing phonemic processing of a .TextGrid file, set to
+        True to build the phonetic representation of each word from its aligned phones, i.e.
+        the pronunciation actually spoken, instead of the CMU dictionary.
+    :param sweep_thresholds (optional): A list of similarity thresholds, or a string such as
+        "0.1,0.2,0.3" or "0.1:0.5:0.05" (start:stop:step, stop included). If given, the
+        collection and timing measures are also computed at each threshold and, if a csv file
+        is written, saved next to it with "_sweep" appended to the name.
+    :param lsa_sweep (optional): When doing semantic processing, set to True to compute the LSA
+        measures in every LSA dimensionality from 50 to 100 (named lsa50 to lsa100), each with
+        its built-in threshold, instead of only the default dimensionality.
+    :param word_tier (optional): When processing a .TextGrid file, the name of the tier holding
+        the words. By default, the first tier is used.
+    :param phone_tier (optional): When processing a .TextGrid file, the name of the tier holding
+        the phones. By default, the second tier is used.
+    :param textgrid_cache (optional): A directory in which parsed .TextGrid files are cached, so
+        that processing them again skips parsing. By default, nothing is cached.
+    :param textgrid_cache_size (optional): The maximum size of the TextGrid cache in megabytes
+        (default 100). The least recently used entries are deleted beyond it.
 
     :return data: A dictionary of measures derived by clustering the input response.
 
@@ -1635,6 +2056,14 @@ def get_duration_measures(source_file_path,
     args.quiet = quiet
     args.similarity_file = similarity_file
     args.threshold = threshold
+    args.t2p_workers = t2p_workers
+    args.aligned_phones = aligned_phones
+    args.sweep_thresholds = sweep_thresholds
+    args.lsa_sweep = lsa_sweep
+    args.word_tier = word_tier
+    args.phone_tier = phone_tier
+    args.textgrid_cache = textgrid_cache
+    args.textgrid_cache_size = textgrid_cache_size
     args = validate_arguments(args)
 
     if args.phonemic:
@@ -1654,16 +2083,264 @@ def get_duration_measures(source_file_path,
         #no output to system
         target_file_path = False
 
-    engine = VFClustEngine(response_category=response_category,
-                      response_file_path=args.source_file_path,
-                      target_file_path=target_file_path,
-                      quiet = args.quiet,
-                      similarity_file = args.similarity_file,
-                      threshold = args.threshold
-    )
+    analyzer = VFClustAnalyzer(response_category=response_category,
+                               quiet = args.quiet,
+                               similarity_file = args.similarity_file,
+                               threshold = args.threshold,
+                               t2p_workers = args.t2p_workers,
+                               use_aligned_phones = args.aligned_phones,
+                               lsa_sweep = args.lsa_sweep,
+                               word_tier = args.word_tier,
+                               phone_tier = args.phone_tier,
+                               textgrid_cache = args.textgrid_cache,
+                               textgrid_cache_size = args.textgrid_cache_size)
+
+    try:
+        return analyzer.analyze(args.source_file_path,
+                                target_file_path=target_file_path,
+                                sweep_thresholds=args.sweep_thresholds)
+    finally:
+        analyzer.close()
+
+
+#analyzer of a batch worker process, created once per process by init_batch_worker()
+batch_analyzer = None
+batch_analyzer_error = None
+batch_sweep_thresholds = None
+
+def init_batch_worker(analyzer_args, sweep_thresholds=None):
+    """Creates the analyzer of a batch worker process, so that its resources are loaded once.
+
+    :param dict analyzer_args: keyword arguments of VFClustAnalyzer.
+    :param list sweep_thresholds: (optional) similarity thresholds of a sweep, as in analyze().
+    """
+    global batch_analyzer, batch_analyzer_error, batch_sweep_thresholds
+    batch_sweep_thresholds = sweep_thresholds
+    try:
+        batch_analyzer = VFClustAnalyzer(**analyzer_args)
+    except Exception as e:
+        #reported for every file, rather than letting the pool restart the worker forever
+        batch_analyzer_error = "%s: %s" % (type(e).__name__, e)
+    #run when a worker process of the pool exits
+    multiprocessing.util.Finalize(None, close_batch_worker, exitpriority = 10)
+
+def close_batch_worker():
+    """Closes the analyzer of a batch worker process, if it has not been closed yet."""
+    global batch_analyzer
+    if batch_analyzer is not None:
+        batch_analyzer.close()
+        batch_analyzer = None
+
+def analyze_batch_file(source_file_path):
+    """Clusters one response of a batch with the analyzer of the current worker process.
+
+    :param str source_file_path: file path of the response (.csv or .TextGrid).
+    :return: (measures, sweep_rows, error).  If the response could not be processed, measures
+        and sweep_rows are None and error is a message; otherwise error is None.
+    """
+    if batch_analyzer is None:
+        return None, None, batch_analyzer_error
+    try:
+        check_source_file(source_file_path)
+        engine = VFClustEngine(response_category=batch_analyzer.response_category,
+                               response_file_path=source_file_path,
+                               analyzer=batch_analyzer,
+                               sweep_thresholds=batch_sweep_thresholds)
+        sweep_rows = engine.get_sweep_rows() if batch_sweep_thresholds else []
+        return dict(engine.measures), sweep_rows, None
+    except Exception as e:
+        return None, None, "%s: %s" % (type(e).__name__, e)
+
+def find_source_files(sources, manifest=None):
+    """Returns the response files named by a list of files, directories and glob patterns.
+
+    :param list sources: paths of response files, directories (whose .csv and .TextGrid files
+        are used) or glob patterns such as "responses/*.TextGrid".
+    :param str manifest: (optional) path of a text file listing more sources, one per line.
+        Blank lines and lines starting with # are skipped, and relative paths are relative
+        to the directory of the manifest.
+    :return: list of file paths, in the order given, with the files of each directory or
+        pattern sorted by name.  Paths that match nothing are kept, so that they are reported
+        as failures.
+    """
+    sources = list(sources)
+    if manifest:
+        manifest_directory = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, 'r') as infile:
+            for line in infile:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    sources.append(os.path.join(manifest_directory, line))
+
+    source_file_paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            source_file_paths.extend(sorted(os.path.join(source, name) for name in os.listdir(source)
+                                            if name.lower().endswith(('.csv', '.textgrid'))))
+        elif glob.has_magic(source):
+            source_file_paths.extend(sorted(glob.glob(source)) or [source])
+        else:
+            source_file_paths.append(source)
+    return [os.path.abspath(path) for path in source_file_paths]
+
+def get_batch_measures(sources,
+                       manifest=None,
+                       output_path="",
+                       processes=1,
+                       phonemic=False,
+                       semantic=False,
+                       quiet=False,
+                       similarity_file = None,
+                       threshold = None,
+                       t2p_workers = 0,
+                       aligned_phones = False,
+                       sweep_thresholds = None,
+                       lsa_sweep = False,
+                       word_tier = None,
+                       phone_tier = None,
+                       textgrid_cache = None,
+                       textgrid_cache_size = 100):
+    """Runs the clustering algorithm on many responses, in a pool of processes.
+
+    Each process loads the resources of the category once and then clusters its share of the
+    responses.  The measures of all responses are written to a single .csv file, one row per
+    response in the order given, whatever the order in which the processes finish them.  A
+    response that cannot be processed is reported, and gets a row holding the error, but does
+    not stop the others.
+
+    :param sources: A list of paths of .csv or .TextGrid files, directories holding them, or
+        glob patterns (see find_source_files).
+    :param manifest (optional): Path of a text file listing more sources, one per line.
+    :param output_path: Directory in which to write the .csv file, named
+        batch_vfclust_(phonemic|semantic)_(category).csv. If empty (default) or None, the
+        current directory is used.  If set to False, no file will be written.
+    :param processes (optional): The number of worker processes. If 1 (default), responses are
+        processed in this process.
+
+    The other parameters are as for get_duration_measures, and apply to every response.  Screen
+    output for each response is suppressed; unless quiet is True, one line is printed per
+    response as it completes.
+
+    :return results: A list with one (source_file_path, measures, error) tuple per response, in
+        order.  If the response could not be processed, measures is None and error is a message;
+        otherwise error is None.
+    """
 
+    args = Args()
+    args.output_path = output_path
+    args.phonemic = phonemic
+    args.semantic = semantic
+    args.source_file_path = None
+    args.quiet = quiet
+    args.similarity_file = similarity_file
+    args.threshold = threshold
+    args.t2p_workers = t2p_workers
+    args.aligned_phones = aligned_phones
+    args.sweep_thresholds = sweep_thresholds
+    args.lsa_sweep = lsa_sweep
+    args.word_tier = word_tier
+    args.phone_tier = phone_tier
+    args.textgrid_cache = textgrid_cache
+    args.textgrid_cache_size = textgrid_cache_size
+    args = validate_arguments(args)
 
-    return dict(engine.measures)
+    source_file_paths = find_source_files(sources, manifest)
+    if not source_file_paths:
+        raise VFClustException('No .csv or .TextGrid files were found in the sources you provided.')
+
+    if args.phonemic:
+        response_category = args.phonemic
+        output_prefix = "batch_vfclust_phonemic_" + args.phonemic
+        response_type = "PHONETIC"
+    else:
+        response_category = args.semantic
+        output_prefix = "batch_vfclust_semantic_" + args.semantic
+        response_type = "SEMANTIC"
+
+    analyzer_args = dict(response_category = response_category,
+                         quiet = True,
+                         similarity_file = args.similarity_file,
+                         threshold = args.threshold,
+                         t2p_workers = args.t2p_workers,
+                         use_aligned_phones = args.aligned_phones,
+                         lsa_sweep = args.lsa_sweep,
+                         word_tier = args.word_tier,
+                         phone_tier = args.phone_tier,
+                         textgrid_cache = args.textgrid_cache,
+                         textgrid_cache_size = args.textgrid_cache_size)
+
+    pool = None
+    if processes > 1:
+        pool = multiprocessing.Pool(processes, initializer = init_batch_worker,
+                                    initargs = (analyzer_args, args.sweep_thresholds))
+        # imap returns the outcomes in the order of the files, not of completion
+        outcomes = pool.imap(analyze_batch_file, source_file_paths)
+    else:
+        init_batch_worker(analyzer_args, args.sweep_thresholds)
+        outcomes = itertools.imap(analyze_batch_file, source_file_paths)
+
+    results = []
+    sweep_rows = []
+    try:
+        for i, (source_file_path, (measures, rows, error)) in enumerate(itertools.izip(source_file_paths, outcomes)):
+            results.append((source_file_path, measures, error))
+            if rows:
+                sweep_rows.extend(rows)
+            if not args.quiet:
+                print "[" + str(i + 1) + "/" + str(len(source_file_paths)) + "]", source_file_path, \
+                    "OK" if error is None else "FAILED (" + error + ")"
+    except:
+        #stop the workers at once, rather than waiting for them to process every queued file
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        raise
+    finally:
+        if pool is None:
+            close_batch_worker()
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+    failures = [result for result in results if result[2] is not None]
+    if not args.quiet:
+        print
+        print "Processed", len(results) - len(failures), "of", len(results), "responses."
+        if failures:
+            print "Failed responses:"
+            print_table([(path, error) for path, _, error in failures])
+
+    if args.output_path:
+        target_file_path = os.path.join(args.output_path, output_prefix + '.csv')
+        write_batch_output(target_file_path, results, response_type)
+        if args.sweep_thresholds:
+            write_sweep_rows(os.path.splitext(target_file_path)[0] + "_sweep.csv", sweep_rows, response_type)
+        if not args.quiet:
+            print "Measures written to", target_file_path
+
+    return results
+
+def write_batch_output(target_file, results, response_type):
+    """ Writes the measures of a batch of responses to a .csv file, one row per response.
+
+    :param str target_file: path of the .csv file to be produced.
+    :param list results: (source_file_path, measures, error) of each response, as returned by
+        get_batch_measures().  Responses that failed have 'NA' measures and their error.
+    :param str response_type: type of the measures ("PHONETIC" or "SEMANTIC"), prefixed to their names.
+    """
+    keys = []
+    for group in ['COUNT_', 'COLLECTION_', 'TIMING_']:
+        keys += sorted(set(key for _, measures, _ in results if measures
+                           for key in measures if group in key))
+    with open(target_file, 'w') as outfile:
+        writer = csv.writer(outfile, quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(['file_id', 'source_file_path', 'error'] + [response_type + "_" + key for key in keys])
+        for source_file_path, measures, error in results:
+            if measures is None:
+                writer.writerow(['NA', source_file_path, error] + ['NA'] * len(keys))
+            else:
+                writer.writerow([measures['file_id'], source_file_path, ''] +
+                                [measures.get(key, 'NA') for key in keys])
 
 
 def validate_arguments(args):
@@ -1687,21 +2364,27 @@ def validate_arguments(args):
             raise VFClustException('Custom threshold (--threshold argument) must be a number.')
 
 
-    if not (args.source_file_path.lower().endswith('csv') or args.source_file_path.lower().endswith('textgrid')):
-        raise VFClustException('The input must be either a .TextGrid or .csv file!\nYou provided ' + args.source_file_path.lower())
-    if not os.path.isfile(args.source_file_path):
-        raise VFClustException('The input file path you provided does not exist on your system!')
+    #in batch mode there is no single source file; each file is checked when it is processed
+    if args.source_file_path is not None:
+        check_source_file(args.source_file_path)
 
     #if no output path provided, write to source file path
     if args.output_path == None:
-        args.output_path = args.source_path
+        if args.source_file_path is None:
+            #in batch mode, there is no single source file: write to the current directory
+            args.output_path = os.getcwd()
+        else:
+            args.output_path = args.source_path
     #if output_path is False, don't output anything
     elif args.output_path == False:
         pass
     else:
         #verify/make folders for output
         if len(args.output_path) == 0:
-            args.output_path = os.path.abspath(os.path.dirname(args.source_file_path))
+            if args.source_file_path is not None:
+                args.output_path = os.path.abspath(os.path.dirname(args.source_file_path))
+            else:
+                args.output_path = os.getcwd()
         try:
             if not os.path.isdir(args.output_path):
                 os.mkdir(args.output_path)
@@ -1737,7 +2420,8 @@ def validate_arguments(args):
         raise VFClustException("You must choose EITHER semantic OR phonemic clustering.")
 
     #make paths absolute
-    args.source_file_path = os.path.abspath(args.source_file_path)
+    if args.source_file_path is not None:
+        args.source_file_path = os.path.abspath(args.source_file_path)
     if args.output_path:
         args.output_path = os.path.abspath(args.output_path)
 
@@ -1753,6 +2437,10 @@ def validate_arguments(args):
             raise VFClustException('Error reading the custom threshold you provided. It must be a number, e.g. --threshold 6.7 or --threshold 10')
         args.similarity_file = os.path.abspath(args.similarity_file)
 
+    #thresholds of a sweep
+    if isinstance(getattr(args, 'sweep_thresholds', None), basestring):
+        args.sweep_thresholds = parse_thresholds(args.sweep_thresholds)
+
     print "OK!"
     print
     print "Parsed arguments:"
@@ -1760,6 +2448,30 @@ def validate_arguments(args):
 
     return args
 
+def check_source_file(source_file_path):
+    """Raises VFClustException unless a response file exists and is a .csv or .TextGrid file."""
+    if not (source_file_path.lower().endswith('csv') or source_file_path.lower().endswith('textgrid')):
+        raise VFClustException('The input must be either a .TextGrid or .csv file!\nYou provided ' + source_file_path.lower())
+    if not os.path.isfile(source_file_path):
+        raise VFClustException('The input file path you provided does not exist on your system!')
+
+def parse_thresholds(text):
+    """Parses a list of thresholds, e.g. "0.1,0.2,0.3", or a range, e.g. "0.1:0.5:0.05" (stop included).
+
+    :param str text: comma-separated thresholds, or start:stop:step.
+    :return: list of floats.
+    """
+    try:
+        if ':' in text:
+            start, stop, step = [float(x) for x in text.split(':')]
+            if step <= 0:
+                raise ValueError
+            count = int(np.floor((stop - start) / step + 1e-9)) + 1
+            return [round(start + i * step, 12) for i in range(max(count, 0))]
+        return [float(x) for x in text.split(',') if x.strip()]
+    except ValueError:
+        raise VFClustException('Error reading the sweep thresholds you provided. Use, e.g., --sweep 0.1,0.2,0.3 or --sweep 0.1:0.5:0.05')
+
 def main(test=False):
 
     if test or (len(sys.argv) > 1 and sys.argv[1] == "test"):
@@ -1768,8 +2480,9 @@ def main(test=False):
 
         parser = argparse.ArgumentParser()
 
-        parser.add_argument('source_file_path',
-                            help="Full path of textgrid or csv file to parse")
+        parser.add_argument('source_file_path', nargs='*',
+                            help='''Full path of textgrid or csv file to parse.  Several files, directories
+                                    or glob patterns (e.g. "responses/*.TextGrid") are processed as a batch.''')
 
         parser.add_argument('-s', dest='semantic',
                             default=False,action="store",
@@ -1806,15 +2519,88 @@ def main(test=False):
                                     A custom threshold can also be set when using semantic or phonemic clustering.
                                     In this case, it would override the default threshold implemented in the program.''')
 
+        parser.add_argument('--t2p-workers', dest='t2p_workers', default=0, type=int,
+                            help='''Usage: --t2p-workers N, where N is a number.
+                                    If included, words missing from the CMU dictionary are transcribed
+                                    by N long-lived processes of the t2p binary rather than in-process.''')
+
+        parser.add_argument('--sweep', dest='sweep_thresholds', default=None,
+                            help='''Usage: --sweep 0.1,0.2,0.3 or --sweep 0.1:0.5:0.05 (start:stop:step).
+                                    If included, collection and timing measures are also computed at each
+                                    of these similarity thresholds and written to a separate _sweep.csv file.''')
+
+        parser.add_argument('--lsa-sweep', dest='lsa_sweep', default=False, action='store_true',
+                            help="Compute LSA measures in every LSA dimensionality from 50 to 100 (lsa50 to lsa100).")
+
+        parser.add_argument('--aligned-phones', dest='aligned_phones', default=False, action='store_true',
+                            help="Use the phones of a .TextGrid response as the pronunciation of each word in phonemic clustering.")
+
+        parser.add_argument('--word-tier', dest='word_tier', default=None,
+                            help="Name of the tier of words in a .TextGrid response (default: the first tier).")
+
+        parser.add_argument('--phone-tier', dest='phone_tier', default=None,
+                            help="Name of the tier of phones in a .TextGrid response (default: the second tier).")
+
+        parser.add_argument('--textgrid-cache', dest='textgrid_cache', default=None,
+                            help='''Usage: --textgrid-cache /path/to/cache/directory\n
+                                    If included, parsed .TextGrid files are cached in this directory,
+                                    so that processing them again skips parsing.''')
+
+        parser.add_argument('--textgrid-cache-size', dest='textgrid_cache_size', default=100, type=float,
+                            help="Maximum size of the TextGrid cache in megabytes (default: 100).")
+
+        parser.add_argument('--manifest', dest='manifest', default=None,
+                            help='''Usage: --manifest /path/to/manifest\n
+                                    Text file listing response files, directories or glob patterns to
+                                    process as a batch, one per line.''')
+
+        parser.add_argument('--processes', dest='processes', default=1, type=int,
+                            help='''Usage: --processes N, where N is a number.
+                                    In batch mode, the responses are clustered by N worker processes,
+                                    each loading the resources once.''')
+
         args = parser.parse_args()
 
+        sources = args.source_file_path
+        if not (sources or args.manifest):
+            parser.error("a source file path or --manifest is required")
+
+        if args.manifest or len(sources) > 1 or os.path.isdir(sources[0]) or glob.has_magic(sources[0]):
+            #batch mode: one csv file with a row per response
+            get_batch_measures(sources,
+                               manifest = args.manifest,
+                               output_path = args.output_path,
+                               processes = args.processes,
+                               phonemic = args.phonemic,
+                               semantic = args.semantic,
+                               quiet = args.quiet,
+                               similarity_file = args.similarity_file,
+                               threshold = args.threshold,
+                               t2p_workers = args.t2p_workers,
+                               aligned_phones = args.aligned_phones,
+                               sweep_thresholds = args.sweep_thresholds,
+                               lsa_sweep = args.lsa_sweep,
+                               word_tier = args.word_tier,
+                               phone_tier = args.phone_tier,
+                               textgrid_cache = args.textgrid_cache,
+                               textgrid_cache_size = args.textgrid_cache_size)
+            return
+
         get_duration_measures(output_path=args.output_path,
                                         phonemic=args.phonemic,
                                         semantic=args.semantic,
-                                        source_file_path=args.source_file_path,
+                                        source_file_path=sources[0],
                                         quiet=args.quiet,
                                         similarity_file = args.similarity_file,
-                                        threshold = args.threshold
+                                        threshold = args.threshold,
+                                        t2p_workers = args.t2p_workers,
+                                        aligned_phones = args.aligned_phones,
+                                        sweep_thresholds = args.sweep_thresholds,
+                                        lsa_sweep = args.lsa_sweep,
+                                        word_tier = args.word_tier,
+                                        phone_tier = args.phone_tier,
+                                        textgrid_cache = args.textgrid_cache,
+                                        textgrid_cache_size = args.textgrid_cache_size
                                         )
 
 def test_script():
@@ -1822,9 +2608,22 @@ def test_script():
     example_csv = os.path.join(path,'EXAMPLE.csv')
     example_textgrid = os.path.join(path,'EXAMPLE_sem.TextGrid')
     example_textgrid_custom = os.path.join(path,'EXAMPLE_sem_custom.TextGrid')
+    example_textgrid_phonemic = os.path.join(path,'EXAMPLE.TextGrid')
+    example_textgrid_short = os.path.join(path,'EXAMPLE_short.TextGrid')
+    example_textgrid_binary = os.path.join(path,'EXAMPLE_binary.TextGrid')
     print example_csv
     print example_textgrid
 
+    #the short text and binary copies of EXAMPLE.TextGrid must be read as the same words and phones
+    parsed_words = []
+    for textgrid_path in [example_textgrid_phonemic, example_textgrid_short, example_textgrid_binary]:
+        print textgrid_path
+        parsed_words.append([(str(word), [str(phone) for phone in word.phones])
+                             for word in TextGrid(textgrid_path).parse_words()])
+    if parsed_words[1] != parsed_words[0] or parsed_words[2] != parsed_words[0]:
+        raise Exception('The short text and binary copies of EXAMPLE.TextGrid were not read as ' +
+                        'the same words and phones.')
+
     results_csv = get_duration_measures(source_file_path = example_csv,
                                                 output_path=False,
                                                 phonemic='f')
@@ -1835,6 +2634,9 @@ def test_script():
                                                 output_path=False,
                                                 similarity_file = os.path.abspath(os.path.join(os.path.dirname(__file__),'data','similarity','similarity_rand.txt')),
                                                 threshold = 0.5)
+    results_textgrid_binary = get_duration_measures(source_file_path = example_textgrid_binary,
+                                                output_path=False,
+                                                phonemic='s')
 
     print "TEST FINISHED SUCCESSFULLY"
 